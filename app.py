@@ -1,9 +1,25 @@
 import os
-import sys
-import subprocess
-from flask import Flask, render_template, request, redirect, url_for, session, flash
-from bson.objectid import ObjectId
-from mongo import MongoDB
+import json
+import time
+import hashlib
+import threading
+import email.utils
+from datetime import date, datetime, timedelta, timezone
+from functools import wraps
+from flask import (
+    Flask, Response, render_template, request, redirect, url_for, session, flash, jsonify, make_response, g,
+    stream_with_context, abort,
+)
+from bson.errors import InvalidId
+from dateutil import parser as dateparser
+from pymongo.errors import PyMongoError
+from werkzeug.local import LocalProxy
+from mongo import MongoDB, CARD_FIELDS, ADMIN_FIELDS, API_FIELDS, FEED_FIELDS, collapse_stories
+from textnorm import normalize
+from jobs import JobQueue
+from cache import CachedPage, ResponseCache
+from scraperall import SOURCES
+import metrics
 
 app = Flask(__name__)
 
@@ -16,7 +32,101 @@ ADMIN_PASS = os.getenv("ADMIN_PASS", "1234")
 MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017/")
 MONGO_DB = os.getenv("MONGO_DB", "news_db")
 
-db = MongoDB(uri=MONGO_URI, db_name=MONGO_DB)
+_handles = {}  # pid -> (MongoDB, JobQueue)
+_handles_lock = threading.Lock()
+
+
+def _process_handles():
+    """
+    Ο MongoClient φτιάχνεται στην πρώτη χρήση μέσα στο process που θα τον χρησιμοποιήσει
+    (μετά το fork του gunicorn worker): το import δεν περιμένει τη Mongo και κάθε worker
+    έχει το δικό του connection pool (MONGO_MAX_POOL_SIZE κτλ, βλ. mongo.client_options).
+    """
+    pid = os.getpid()
+    handles = _handles.get(pid)
+    if handles is None:
+        with _handles_lock:
+            handles = _handles.get(pid)
+            if handles is None:
+                _handles.clear()  # του parent πριν το fork: δεν είναι fork-safe, δεν ξαναχρησιμοποιούνται
+                database = MongoDB(uri=MONGO_URI, db_name=MONGO_DB, wait=False)
+                handles = _handles[pid] = (database, JobQueue(database))
+    return handles
+
+
+def get_db() -> MongoDB:
+    return _process_handles()[0]
+
+
+def get_job_queue() -> JobQueue:
+    return _process_handles()[1]
+
+
+db = LocalProxy(get_db)
+job_queue = LocalProxy(get_job_queue)
+page_cache = ResponseCache(max_bytes=int(os.getenv("PAGE_CACHE_MAX_BYTES", 32 * 1024 * 1024)))
+PAGE_CACHE_CONTROL = "public, max-age=60"
+
+API_DEFAULT_FIELDS = ("title", "url", "summary", "image_url", "tags", "published_at", "source", "category")
+API_MAX_LIMIT = 100
+FEED_LIMIT = 50
+FEED_TYPES = {"rss": "application/rss+xml", "atom": "application/atom+xml"}
+
+
+# ------------------ METRICS ------------------
+@app.before_request
+def start_timer():
+    g.request_started = time.perf_counter()
+
+
+@app.after_request
+def record_latency(resp):
+    metrics.share_process()  # gunicorn: τα metrics του worker στο κοινό METRICS_SHARED_DIR
+    started = g.pop("request_started", None)
+    if started is not None:
+        metrics.HTTP_SECONDS.observe(
+            time.perf_counter() - started,
+            endpoint=request.endpoint or "unmatched",
+            method=request.method,
+            status=resp.status_code,
+        )
+    return resp
+
+
+@app.route("/metrics")
+def metrics_endpoint():
+    """
+    Prometheus text format: metrics του web (requests, Mongo commands), αθροισμένα για όλους
+    τους gunicorn workers όταν υπάρχει METRICS_SHARED_DIR, + τα summaries του τελευταίου
+    crawl κάθε πηγής (τρέχουν σε worker/scheduler).
+    """
+    body = metrics.render_prometheus(metrics.shared_snapshot() if metrics.shared_dir() else None)
+    try:
+        body += metrics.render_run_summaries(db.last_run_metrics())
+    except PyMongoError:
+        pass  # χωρίς Mongo: μόνο τα metrics του process (π.χ. για να φαίνονται τα Mongo errors)
+    return Response(body, mimetype="text/plain; version=0.0.4")
+
+
+# ------------------ HEALTH ------------------
+@app.route("/healthz")
+def healthz():
+    """
+    Liveness: το process απαντά (χωρίς Mongo, ώστε ένα πρόβλημα της βάσης να μη γίνεται restart).
+    """
+    return jsonify({"status": "ok"})
+
+
+@app.route("/readyz")
+def readyz():
+    """
+    Readiness: ping στη Mongo. 503 όσο δεν απαντά, για να μη στέλνει traffic ο load balancer.
+    """
+    try:
+        db.ping()
+    except PyMongoError as e:
+        return jsonify({"status": "unavailable", "error": str(e)[:200]}), 503
+    return jsonify({"status": "ready"})
 
 
 # ------------------ HELPERS ------------------
@@ -30,49 +140,282 @@ def parse_tags_csv(s: str):
     return [t.strip() for t in (s or "").split(",") if t.strip()]
 
 
+def _date_arg(value: str):
+    """
+    YYYY-MM-DD (ή πλήρες ISO) -> ISO string για σύγκριση με το published_at. None αν είναι άκυρο.
+    """
+    try:
+        return datetime.fromisoformat(value).isoformat() if len(value) > 10 else date.fromisoformat(value).isoformat()
+    except ValueError:
+        return None
+
+
+def published_at_arg(value: str):
+    """
+    published_at της φόρμας admin -> ISO string, όπως το γράφουν οι scrapers (η σειρά/τα
+    cursors/το archive cutoff συγκρίνουν ISO strings). "" -> None. ValueError αν δεν είναι ημερομηνία.
+    Δεκτά: ISO (2025-01-01T12:00) και ημέρα πρώτα (12/03/2024 12:00).
+    """
+    value = (value or "").strip()
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value).isoformat()
+    except ValueError:
+        pass
+    try:
+        return dateparser.parse(value, dayfirst=True).isoformat()
+    except (ValueError, OverflowError) as e:
+        raise ValueError(f"Μη έγκυρη ημερομηνία: {value}") from e
+
+
+def article_filters(args):
+    """
+    (query, filters) από τα category/source/tag του request: equality στα κανονικοποιημένα keys
+    => compound indexes (key, published_at). Κοινό για home, API, feeds, export.
+    from/to (ημερομηνίες, το to inclusive): εύρος published_at, που φέρνει και άρθρα του archive.
+    """
+    filters = {k: (args.get(k) or "").strip() for k in ("category", "source", "tag", "from", "to")}
+    filters = {k: v for k, v in filters.items() if v}
+    query = {}
+    if "category" in filters:
+        query["category_key"] = normalize(filters["category"])
+    if "source" in filters:
+        query["source_key"] = normalize(filters["source"])
+    if "tag" in filters:
+        query["tag_keys"] = normalize(filters["tag"])
+
+    date_range = {}
+    start = _date_arg(filters.get("from", ""))
+    if start:
+        date_range["$gte"] = start
+    end = _date_arg(filters.get("to", ""))
+    if end:
+        # ημερομηνία χωρίς ώρα: όλη η ημέρα (μέχρι την αρχή της επόμενης)
+        date_range.update({"$lt": (date.fromisoformat(end) + timedelta(days=1)).isoformat()}
+                          if len(end) == 10 else {"$lte": end})
+    for key, value in (("from", start), ("to", end)):
+        if key in filters and not value:
+            filters.pop(key)  # άκυρη ημερομηνία: αγνοείται
+    if date_range:
+        query["published_at"] = date_range
+    return query, filters
+
+
+def api_fields(args):
+    """
+    ?fields=title,url,... (μόνο από το API_FIELDS). None αν ζητήθηκε άγνωστο πεδίο.
+    """
+    requested = parse_tags_csv(args.get("fields"))
+    if not requested:
+        return API_DEFAULT_FIELDS
+    if any(f not in API_FIELDS for f in requested):
+        return None
+    return tuple(requested)
+
+
+def api_doc(doc: dict) -> dict:
+    doc = dict(doc)
+    doc["id"] = str(doc.pop("_id"))
+    return doc
+
+
+def _to_datetime(value):
+    try:
+        dt = datetime.fromisoformat(value) if value else None
+    except (TypeError, ValueError):
+        return None
+    if dt and dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt
+
+
+@app.template_filter("rfc822")
+def rfc822(value):
+    dt = _to_datetime(value)
+    return email.utils.format_datetime(dt) if dt else ""
+
+
+@app.template_filter("rfc3339")
+def rfc3339(value):
+    dt = _to_datetime(value)
+    return dt.isoformat() if dt else ""
+
+
+def cached_page(view):
+    """
+    Response cache για public σελίδες: LRU με key (path, κανονικοποιημένα args) που κρατά
+    τα rendered bytes. Ακυρώνεται όταν αλλάξει το db.content_version().
+    Strong ETag + Cache-Control, και 304 στα conditional requests χωρίς render/Mongo.
+    Με session (admin, flash μηνύματα) η σελίδα είναι προσωπική: χωρίς cache.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if session:
+            return view(*args, **kwargs)
+
+        key = (request.path, tuple(sorted(
+            (k, v.strip()) for k, v in request.args.items(multi=True) if v.strip()
+        )))
+        version = db.content_version()
+        entry = page_cache.get(key)
+
+        if entry is None or entry.version != version:
+            resp = make_response(view(*args, **kwargs))
+            if resp.status_code != 200:
+                return resp
+            body = resp.get_data()
+            etag = hashlib.sha1(body).hexdigest()
+            entry = page_cache.put(key, CachedPage(version, etag, body, resp.mimetype))
+
+        if request.if_none_match.contains(entry.etag):
+            resp = Response(status=304)
+        else:
+            resp = Response(entry.body, mimetype=entry.mimetype)
+        resp.set_etag(entry.etag)
+        resp.headers["Cache-Control"] = PAGE_CACHE_CONTROL
+        return resp
+
+    return wrapper
+
+
 # ------------------ PUBLIC ------------------
 @app.route("/")
+@cached_page
 def home():
-    category = (request.args.get("category") or "").strip()
-    source = (request.args.get("source") or "").strip()
-    tag = (request.args.get("tag") or "").strip()
+    query, filters = article_filters(request.args)
     q = (request.args.get("q") or "").strip()
 
-    query = {}
-
-    if category:
-        query["category"] = {"$regex": category, "$options": "i"}
-    if source:
-        query["source"] = {"$regex": f"^{source}$", "$options": "i"}
-    if tag:
-        query["tags"] = {"$elemMatch": {"$regex": tag, "$options": "i"}}
     if q:
-        query["$or"] = [
-            {"title": {"$regex": q, "$options": "i"}},
-            {"summary": {"$regex": q, "$options": "i"}},
-        ]
-
-    articles = db.list_articles(limit=30, query=query)
-    sources = db.distinct_sources()
-    categories = db.distinct_categories()
+        # q: text index (relevance), όχι unanchored $regex. Relevance order => χωρίς keyset cursors.
+        articles, _ = collapse_stories(db.list_articles(limit=60, query=query, text=q, fields=CARD_FIELDS), 30)
+        next_cursor = prev_cursor = None
+    else:
+        articles, next_cursor, prev_cursor = db.page_articles(
+            limit=30,
+            query=query,
+            before=request.args.get("before"),
+            after=request.args.get("after"),
+            fields=CARD_FIELDS,
+            collapse=True,  # ένα card ανά είδηση (near-duplicates από διαφορετικές πηγές)
+        )
+    # cached facets (value, count), όχι distinct ανά request
+    sources = db.facet_counts("source")
+    categories = db.facet_counts("category")
 
     return render_template(
         "public.html",
         articles=articles,
         sources=sources,
         categories=categories,
+        filters=filters,
+        next_cursor=next_cursor,
+        prev_cursor=prev_cursor,
     )
 
 
 @app.route("/article/<id>")
+@cached_page
 def view_article(id):
-    a = db.articles.find_one({"_id": ObjectId(id)})
+    a = db.get_rendered_article(id)
     if not a:
         flash("Δεν βρέθηκε άρθρο.")
         return redirect(url_for("home"))
     return render_template("article.html", a=a)
 
 
+# ------------------ API / FEEDS ------------------
+@app.route("/api/articles")
+@cached_page
+def api_articles():
+    """
+    JSON με τα ίδια φίλτρα με το home (category/source/tag/q), keyset cursors (before/after),
+    limit (<= API_MAX_LIMIT), fields (επιλογή πεδίων) και collapse=1 (ένα άρθρο ανά story).
+    """
+    fields = api_fields(request.args)
+    if fields is None:
+        return jsonify({"error": "unknown field", "allowed": list(API_FIELDS)}), 400
+    try:
+        limit = min(API_MAX_LIMIT, max(1, int(request.args.get("limit", 30))))
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
+
+    query, _ = article_filters(request.args)
+    q = (request.args.get("q") or "").strip()
+    collapse = request.args.get("collapse") == "1"
+    # το collapse χρειάζεται το story_id· αν δεν ζητήθηκε, δεν εμφανίζεται στο αποτέλεσμα
+    hidden = {"score"}
+    if collapse and "story_id" not in fields:
+        fields = (*fields, "story_id")
+        hidden.add("story_id")
+    if q:
+        articles = db.list_articles(limit=limit * 2 if collapse else limit, query=query, text=q, fields=fields)
+        articles = collapse_stories(articles, limit)[0] if collapse else articles
+        next_cursor = prev_cursor = None
+    else:
+        articles, next_cursor, prev_cursor = db.page_articles(
+            limit=limit,
+            query=query,
+            before=request.args.get("before"),
+            after=request.args.get("after"),
+            fields=fields,
+            collapse=collapse,
+        )
+    return jsonify({
+        "articles": [api_doc({k: v for k, v in a.items() if k not in hidden}) for a in articles],
+        "next_cursor": next_cursor,
+        "prev_cursor": prev_cursor,
+    })
+
+
+@app.route("/api/export.ndjson")
+def api_export():
+    """
+    Bulk export: ένα άρθρο ανά γραμμή, streaming από Mongo cursor σε batches (σταθερή μνήμη).
+    Ίδια φίλτρα/fields με το /api/articles. Weak ETag από το content version: ένα 304 χωρίς query
+    όταν δεν άλλαξε τίποτα από το προηγούμενο poll.
+    """
+    fields = api_fields(request.args)
+    if fields is None:
+        return jsonify({"error": "unknown field", "allowed": list(API_FIELDS)}), 400
+    query, _ = article_filters(request.args)
+
+    etag = hashlib.sha1(f"{db.content_version()}:{request.query_string.decode()}".encode()).hexdigest()
+    if request.if_none_match.contains_weak(etag):
+        resp = Response(status=304)
+    else:
+        def generate():
+            for doc in db.iter_articles(query=query, fields=fields):
+                yield json.dumps(api_doc(doc), ensure_ascii=False, default=str) + "\n"
+
+        resp = Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+    resp.set_etag(etag, weak=True)
+    resp.headers["Cache-Control"] = PAGE_CACHE_CONTROL
+    return resp
+
+
+@app.route("/feeds/<kind>", defaults={"facet": None, "value": None})
+@app.route("/feeds/<facet>/<value>/<kind>")
+@cached_page
+def feed(kind, facet, value):
+    """
+    RSS/Atom με τα τελευταία FEED_LIMIT άρθρα: όλα, ανά πηγή (/feeds/source/<πηγή>/rss)
+    ή ανά κατηγορία (/feeds/category/<κατηγορία>/atom).
+    """
+    if kind not in FEED_TYPES or facet not in (None, "source", "category"):
+        abort(404)
+    query, filters = article_filters({facet: value} if facet else {})
+    articles, _, _ = db.page_articles(limit=FEED_LIMIT, query=query, fields=FEED_FIELDS)
+    body = render_template(
+        f"feed_{kind}.xml",
+        articles=articles,
+        title=" - ".join(["News Aggregator", *filters.values()]),
+        self_url=request.url,
+        updated=articles[0].get("published_at") if articles else None,
+    )
+    return Response(body, mimetype=FEED_TYPES[kind])
+
+
 # ------------------ LOGIN ------------------
 @app.route("/login", methods=["GET", "POST"])
 def login():
@@ -101,8 +444,22 @@ def admin():
     if guard:
         return guard
 
-    articles = db.list_articles(limit=200)
-    return render_template("admin.html", articles=articles)
+    articles, next_cursor, prev_cursor = db.page_articles(
+        limit=50,
+        before=request.args.get("before"),
+        after=request.args.get("after"),
+        fields=ADMIN_FIELDS,
+    )
+    jobs = job_queue.recent(limit=5)
+    schedule = sorted(db.get_schedule().values(), key=lambda s: s["_id"])
+    return render_template(
+        "admin.html",
+        articles=articles,
+        jobs=jobs,
+        schedule=schedule,
+        next_cursor=next_cursor,
+        prev_cursor=prev_cursor,
+    )
 
 
 # ------------------ CREATE ------------------
@@ -113,10 +470,15 @@ def create_article():
         return guard
 
     if request.method == "POST":
+        try:
+            published_at = published_at_arg(request.form.get("published_at"))
+        except ValueError as e:
+            flash(str(e))
+            return render_template("create.html"), 400
         article = {
             "url": (request.form.get("url") or "").strip(),
             "title": (request.form.get("title") or "").strip(),
-            "published_at": (request.form.get("published_at") or "").strip() or None,
+            "published_at": published_at,
             "category": (request.form.get("category") or "").strip() or None,
             "source": (request.form.get("source") or "").strip() or None,
             "image_url": (request.form.get("image_url") or "").strip() or None,
@@ -138,16 +500,21 @@ def update_article(id):
     if guard:
         return guard
 
-    article = db.articles.find_one({"_id": ObjectId(id)})
+    article = db.get_article(id)
     if not article:
         flash("Δεν βρέθηκε το άρθρο")
         return redirect(url_for("admin"))
 
     if request.method == "POST":
+        try:
+            published_at = published_at_arg(request.form.get("published_at"))
+        except ValueError as e:
+            flash(str(e))
+            return render_template("update.html", article={**article, "published_at": request.form.get("published_at")}), 400
         update_data = {
             "url": (request.form.get("url") or "").strip(),
             "title": (request.form.get("title") or "").strip(),
-            "published_at": (request.form.get("published_at") or "").strip() or None,
+            "published_at": published_at,
             "category": (request.form.get("category") or "").strip() or None,
             "source": (request.form.get("source") or "").strip() or None,
             "image_url": (request.form.get("image_url") or "").strip() or None,
@@ -155,7 +522,7 @@ def update_article(id):
             "tags": parse_tags_csv(request.form.get("tags")),
             "html_content": request.form.get("html_content") or None,
         }
-        db.articles.update_one({"_id": ObjectId(id)}, {"$set": update_data})
+        db.update_article(id, update_data)
         flash("Το άρθρο ενημερώθηκε")
         return redirect(url_for("admin"))
 
@@ -169,7 +536,10 @@ def delete_article(id):
     if guard:
         return guard
 
-    db.articles.delete_one({"_id": ObjectId(id)})
+    try:
+        db.delete_article(id)
+    except InvalidId:
+        pass
     flash("Το άρθρο διαγράφηκε")
     return redirect(url_for("admin"))
 
@@ -200,23 +570,36 @@ def run_scraper():
     if delay_f < 0:
         delay_f = 1.0
 
-    if source == "naftemporiki":
-        cmd = [sys.executable, "scraper_na.py", "--pages", str(pages_i), "--delay", str(delay_f)]
-        msg = "Έγινε scraping από Ναυτεμπορική"
-    elif source == "kathimerini":
-        cmd = [sys.executable, "scraper_ka.py", "--pages", str(pages_i), "--delay", str(delay_f)]
-        msg = "Έγινε scraping από Καθημερινή"
-    else:
-        cmd = [sys.executable, "scraperall.py", "--pages", str(pages_i), "--delay", str(delay_f)]
-        msg = "Έγινε scraping από όλες τις πηγές"
+    sources = [source] if source in SOURCES else None
+
+    # δεν τρέχει εδώ: μπαίνει στην ουρά και το παίρνει το worker.py
+    job_id, created = job_queue.enqueue(sources=sources, pages=pages_i, delay=delay_f)
 
-    # timeout ώστε να μην “κολλάει” για πάντα (portfolio-friendly)
-    subprocess.run(cmd, check=False, timeout=600)
+    if request.accept_mimetypes.best == "application/json":
+        return jsonify({"job_id": str(job_id), "created": created}), 202 if created else 200
 
-    flash(msg)
+    if created:
+        flash(f"Το scraping μπήκε στην ουρά (job {job_id})")
+    else:
+        flash(f"Υπάρχει ήδη ίδιο scraping σε εξέλιξη (job {job_id})")
     return redirect(url_for("admin"))
 
 
+@app.route("/scrape/<job_id>")
+def scrape_status(job_id):
+    guard = require_admin()
+    if guard:
+        return guard
+
+    job = job_queue.get(job_id)
+    if not job:
+        return jsonify({"error": "not found"}), 404
+    job["_id"] = str(job["_id"])
+    job.pop("active_key", None)
+    return jsonify(job)
+
+
 # ------------------ MAIN ------------------
 if __name__ == "__main__":
-    app.run(host="0.0.0.0", port=5000,debug=True)
+    # development server· production: gunicorn -c gunicorn.conf.py (Dockerfile)
+    app.run(host="0.0.0.0", port=int(os.getenv("PORT", 5000)), debug=os.getenv("FLASK_DEBUG", "1") == "1")
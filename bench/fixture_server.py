@@ -0,0 +1,153 @@
+"""
+Τοπικός HTTP server που σερβίρει τα bench/fixtures σαν να ήταν τα sites των πηγών.
+
+- listing URLs (LISTING path κάθε scraper, ?page=N): το listing fixture, με μοναδικά article links ανά σελίδα
+- οτιδήποτε άλλο: ένα article fixture της πηγής, με canonical/og:url το URL του request
+- latency και error rate (503) ανά request, ρυθμιζόμενα
+- gzip όταν το ζητά ο client (Accept-Encoding), όπως τα πραγματικά sites
+
+Τα requests του scraper φτάνουν εδώ μέσω LocalAdapter (ξαναγράφει το URL, κρατά το Host).
+"""
+import gzip
+import random
+import re
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit, urlunsplit
+
+from requests.adapters import HTTPAdapter
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+# host -> (fixture prefix, listing path)
+SITES = {
+    "www.naftemporiki.gr": ("naftemporiki", "/newsroom/"),
+    "www.kathimerini.gr": ("kathimerini", "/epikairothta/"),
+}
+
+_ARTICLE_ID = re.compile(rb"/(\d{5,})/")
+_CANONICAL = re.compile(rb'(<link rel="canonical" href=")[^"]*(")')
+_OG_URL = re.compile(rb'(<meta property="og:url" content=")[^"]*(")')
+
+
+class FixtureServer:
+    def __init__(self, latency: float = 0.0, error_rate: float = 0.0, seed: int = 0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.pages = {}
+        for host, (prefix, _) in SITES.items():
+            self.pages[host] = {
+                "listing": (FIXTURES / f"{prefix}_listing.html").read_bytes(),
+                "articles": [p.read_bytes() for p in sorted(FIXTURES.glob(f"{prefix}_article_*.html"))],
+            }
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name="fixture-server", daemon=True)
+
+    @property
+    def address(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"{host}:{port}"
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _fail(self) -> bool:
+        with self.lock:
+            self.requests += 1
+            failed = self.error_rate > 0 and self.random.random() < self.error_rate
+            self.errors += failed
+            return failed
+
+    def render(self, host: str, path: str, query: str) -> bytes | None:
+        site = self.pages.get(host)
+        if site is None:
+            return None
+        _, listing_path = SITES[host]
+        if path == listing_path:
+            page = int((parse_qs(query).get("page") or ["1"])[0])
+            if page == 1:
+                return site["listing"]
+            # μοναδικά article ids ανά σελίδα: /560001234/ -> /2560001234/
+            return _ARTICLE_ID.sub(lambda m: b"/%d%s/" % (page, m.group(1)), site["listing"])
+        body = site["articles"][zlib.crc32(path.encode()) % len(site["articles"])]
+        url = f"https://{host}{path}".encode()
+        body = _CANONICAL.sub(lambda m: m.group(1) + url + m.group(2), body)
+        return _OG_URL.sub(lambda m: m.group(1) + url + m.group(2), body)
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                if server.latency:
+                    time.sleep(server.latency)
+                parts = urlsplit(self.path)
+                if server._fail():
+                    status, body = 503, b"unavailable"
+                else:
+                    body = server.render(self.headers.get("Host", ""), parts.path, parts.query)
+                    status, body = (200, body) if body is not None else (404, b"not found")
+                self.send_response(status)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                if status == 200 and "gzip" in self.headers.get("Accept-Encoding", ""):
+                    body = gzip.compress(body, compresslevel=6)
+                    self.send_header("Content-Encoding", "gzip")
+                    self.send_header("Vary", "Accept-Encoding")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+class LocalAdapter(HTTPAdapter):
+    """
+    Στέλνει κάθε request στο FixtureServer: https://www.site.gr/path -> http://127.0.0.1:port/path,
+    με Host: www.site.gr. Κρατά το max_retries και το pool sizing του adapter που αντικαθιστά.
+    """
+
+    def __init__(self, address: str, **kwargs):
+        self.target = address
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        parts = urlsplit(request.url)
+        request.headers["Host"] = parts.netloc
+        request.url = urlunsplit(("http", self.target, parts.path, parts.query, ""))
+        return super().send(request, **kwargs)
+
+
+def mount_local(session, server: FixtureServer):
+    """
+    Τα https:// requests του session πηγαίνουν στον fixture server (ίδια retry policy και pool).
+    """
+    adapter = session.get_adapter("https://")
+    session.mount("https://", LocalAdapter(
+        server.address, max_retries=adapter.max_retries, pool_connections=adapter._pool_connections,
+        pool_maxsize=adapter._pool_maxsize, pool_block=adapter._pool_block,
+    ))
+    return session
@@ -0,0 +1,66 @@
+"""
+Microbenchmark του parse: pages/sec ανά parser backend πάνω στα fixtures του bench/fixtures.
+
+    python -m bench.parse_bench [--repeat 20] [--json out.json]
+"""
+import argparse
+import json
+import time
+from pathlib import Path
+
+import scraper_ka
+import scraper_na
+from htmlparse import available_backends
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+# fixture prefix -> scraper module
+PARSERS = {
+    "naftemporiki_article": scraper_na,
+    "kathimerini_article": scraper_ka,
+}
+
+
+def load_fixtures():
+    pages = []
+    for prefix, module in PARSERS.items():
+        for path in sorted(FIXTURES.glob(f"{prefix}_*.html")):
+            pages.append((path.name, module, path.read_bytes()))
+    return pages
+
+
+def bench_backend(backend: str, pages, repeat: int) -> dict:
+    # ζέσταμα (imports, caches του parser)
+    for _, module, html in pages:
+        module.parse_html("https://example.invalid/", html, backend)
+
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for _, module, html in pages:
+            module.parse_html("https://example.invalid/", html, backend)
+    elapsed = time.perf_counter() - started
+    n = repeat * len(pages)
+    return {"backend": backend, "pages": n, "seconds": round(elapsed, 3), "pages_per_sec": round(n / elapsed, 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=20, help="Επαναλήψεις ανά fixture")
+    parser.add_argument("--backend", nargs="+", help="Backends (default: όσα είναι εγκατεστημένα)")
+    parser.add_argument("--json", help="Αποθήκευση αποτελεσμάτων σε JSON")
+    args = parser.parse_args()
+
+    pages = load_fixtures()
+    mb = sum(len(html) for _, _, html in pages) / 1e6
+    print(f"{len(pages)} fixture pages ({mb:.2f} MB), repeat={args.repeat}")
+
+    results = [bench_backend(b, pages, args.repeat) for b in (args.backend or available_backends())]
+    for r in results:
+        print(f"{r['backend']:<12} {r['pages_per_sec']:>8} pages/sec  ({r['pages']} pages in {r['seconds']}s)")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
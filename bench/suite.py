@@ -0,0 +1,343 @@
+"""
+Benchmark suite χωρίς network/production Mongo: τοπικός fixture server (bench.fixture_server)
+και Mongo stand-in (mongomock) ή τοπικό mongod (--mongo-uri, σε ξεχωριστή βάση).
+
+Scenarios:
+    crawl          crawl() κάθε πηγής: articles/sec (latency/error rate του server ρυθμιζόμενα)
+    parse          parse_article (fetch + parse) pages/sec, και parse_html μόνο (χωρίς HTTP)
+    home           latency του home() ανά φίλτρο (none/source/category/tag/page2/search) ανά μέγεθος
+    admin          render time του admin() ανά μέγεθος
+
+    python -m bench.suite [--sizes 1000 10000] [--json results.json] [--compare old.json]
+
+Default μεγέθη: 1k/10k με mongomock, 10k/100k/1M με --mongo-uri.
+
+Τα αποτελέσματα (JSON) συγκρίνονται μεταξύ commits με --compare.
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import statistics
+import shutil
+import subprocess
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import requests
+
+from bench.fixture_server import FixtureServer, SITES, mount_local
+from bench.parse_bench import bench_backend, load_fixtures
+
+CATEGORIES = ["Πολιτική", "Οικονομία", "Κόσμος", "Αγορές", "Ενέργεια", "Υγεία", "Αθλητισμός", "Πολιτισμός"]
+TAGS = [f"Θέμα {i}" for i in range(20)]
+SEED_CHUNK = 10_000
+
+# κύρια μετρική ανά scenario (για --compare) και αν "μεγαλύτερο = καλύτερο"
+PRIMARY = {
+    "crawl": ("articles_per_sec", True),
+    "parse_article": ("pages_per_sec", True),
+    "parse_html": ("pages_per_sec", True),
+    "home": ("p50_ms", False),
+    "admin": ("p50_ms", False),
+}
+
+
+def use_mongo(uri: str | None, db_name: str):
+    """
+    mongomock (in-memory) ή τοπικό mongod. Πρέπει να τρέξει πριν γίνει import το app.
+    """
+    import mongo
+
+    os.environ["MONGO_DB"] = db_name
+    if uri:
+        os.environ["MONGO_URI"] = uri
+        return f"mongod ({uri}, db {db_name})"
+    try:
+        import mongomock
+    except ImportError:
+        raise SystemExit("mongomock is not installed: pip install mongomock, or pass --mongo-uri")
+    client = mongomock.MongoClient()
+    mongo.MongoClient = lambda *args, **kwargs: client  # ένας κοινός in-memory client για όλα
+    return f"mongomock {mongomock.__version__}"
+
+
+def timings(samples) -> dict:
+    ms = sorted(s * 1000 for s in samples)
+    return {
+        "requests": len(ms),
+        "mean_ms": round(statistics.fmean(ms), 2),
+        "p50_ms": round(ms[len(ms) // 2], 2),
+        "p95_ms": round(ms[min(len(ms) - 1, int(len(ms) * 0.95))], 2),
+    }
+
+
+def reset(db):
+    for coll in (db.articles, db.archive, db.crawl_state, db.facets, db.meta, db.schedule):
+        coll.delete_many({})
+    # το frontier ακολουθεί τη βάση: άδεια βάση, άδειο frontier
+    for path in Path(os.environ.get("FRONTIER_DIR") or ".").glob("*.bloom"):
+        path.unlink()
+    db._facet_cache.clear()
+
+
+def bench_session(server: FixtureServer, concurrency: int = 4) -> requests.Session:
+    """
+    Το session που φτιάχνει το crawl (httpclient: pool, retries, compression), με τα requests
+    προς τον fixture server.
+    """
+    import httpclient
+
+    return mount_local(httpclient.make_session(pool_size=concurrency, hosts=len(SITES)), server)
+
+
+# ------------------ SCENARIOS ------------------
+def bench_crawl(db, server, pages: int, concurrency: int, parse_workers: int):
+    from scraperall import SOURCES
+
+    results = []
+    for name, crawl in SOURCES.items():
+        reset(db)
+        started = time.perf_counter()
+        stats = crawl(pages=pages, delay=0, concurrency=concurrency, incremental=False,
+                      parse_workers=parse_workers, session=bench_session(server, concurrency), db=db)
+        elapsed = time.perf_counter() - started
+        # δεύτερο crawl των ίδιων σελίδων: μόνο listings, όλα τα links γνωστά (frontier/Mongo)
+        started = time.perf_counter()
+        again = crawl(pages=pages, delay=0, concurrency=concurrency, incremental=False,
+                      parse_workers=parse_workers, session=bench_session(server, concurrency), db=db)
+        recrawl = time.perf_counter() - started
+        results.append({
+            "scenario": "crawl", "source": name, "pages": pages, "concurrency": concurrency,
+            "parse_workers": parse_workers, "latency": server.latency, "error_rate": server.error_rate,
+            "articles": stats["added"], "fetched": stats["pages"], "failures": stats["failures"],
+            "seconds": round(elapsed, 3), "articles_per_sec": round(stats["added"] / elapsed, 1),
+            "recrawl_fetched": again["pages"], "recrawl_seconds": round(recrawl, 3),
+        })
+    return results
+
+
+def bench_parse(server, n: int, repeat: int):
+    import scraper_ka
+    import scraper_na
+    from htmlparse import DEFAULT_BACKEND
+
+    results = []
+    for module, (host, _) in zip((scraper_na, scraper_ka), SITES.items()):
+        source = module.__name__
+        session = bench_session(server)
+        urls = [f"https://{host}/politics/{7_000_000 + i}/bench-{i}/" for i in range(n)]
+        started = time.perf_counter()
+        parsed = sum(1 for url in urls if module.parse_article(url, session))
+        elapsed = time.perf_counter() - started
+        results.append({"scenario": "parse_article", "source": source, "pages": parsed,
+                        "seconds": round(elapsed, 3), "pages_per_sec": round(parsed / elapsed, 1)})
+
+    r = bench_backend(DEFAULT_BACKEND, load_fixtures(), repeat)
+    results.append({"scenario": "parse_html", "source": "fixtures", **r})
+    return results
+
+
+def seed_articles(db, size: int, full_docs: bool = False):
+    """
+    `size` συνθετικά άρθρα από τα article fixtures (derived fields υπολογίζονται μία φορά ανά fixture).
+    Χωρίς full_docs τα βαριά πεδία (html_content, body_text, rendered_html) παραλείπονται:
+    οι λίστες δεν τα διαβάζουν και 1M πλήρη άρθρα δεν χωράνε σε in-memory stand-in.
+    """
+    from mongo import derived_fields
+    from textnorm import normalize
+
+    templates = []
+    for name, module, html in load_fixtures():
+        article = module.parse_html(f"https://example.invalid/{name}", html)
+        doc = {**article, **derived_fields(article)}
+        if not full_docs:
+            for heavy in ("html_content", "body_text", "rendered_html"):
+                doc.pop(heavy, None)
+        templates.append(doc)
+
+    reset(db)
+    newest = datetime(2026, 1, 1)
+    for start in range(0, size, SEED_CHUNK):
+        docs = []
+        for i in range(start, min(size, start + SEED_CHUNK)):
+            t = templates[i % len(templates)]
+            category = CATEGORIES[i % len(CATEGORIES)]
+            tags = [TAGS[i % len(TAGS)], TAGS[(i * 7 + 3) % len(TAGS)]]
+            published = (newest - timedelta(minutes=i)).isoformat()
+            docs.append({
+                **t,
+                "url": f"{t['url']}?n={i}",
+                "title": f"{t['title']} #{i}",
+                "category": category,
+                "category_key": normalize(category),
+                "tags": tags,
+                "tag_keys": sorted({normalize(x) for x in tags}),
+                "published_at": published,
+                "created_at": published,
+                "story_id": str(i),
+            })
+        db.articles.insert_many(docs, ordered=False)
+    db.rebuild_facets()
+    db._bump_content_version()
+
+
+def _measure(client, path: str, n: int, clear=None) -> dict:
+    samples = []
+    for _ in range(n):
+        if clear:
+            clear()
+        started = time.perf_counter()
+        resp = client.get(path)
+        samples.append(time.perf_counter() - started)
+        if resp.status_code != 200:
+            raise RuntimeError(f"{path}: HTTP {resp.status_code}")
+    return timings(samples)
+
+
+def bench_web(sizes, n: int, full_docs: bool, text_search: bool = True):
+    import app as web
+    from textnorm import normalize
+
+    db = web.get_db()
+    client = web.app.test_client()
+    results = []
+    for size in sizes:
+        started = time.perf_counter()
+        seed_articles(db, size, full_docs)
+        print(f"  seeded {size} articles in {time.perf_counter() - started:.1f}s")
+
+        _, next_cursor, _ = db.page_articles(limit=30, fields=("published_at",), collapse=True)
+        filters = {
+            "none": "/",
+            "source": "/?source=kathimerini",
+            "category": f"/?category={CATEGORIES[0]}",
+            "tag": f"/?tag={TAGS[0]}",
+            "page2": f"/?before={next_cursor}",
+            "search": f"/?q={normalize(CATEGORIES[1])}",
+        }
+        for name, path in filters.items():
+            if name == "search" and not text_search:
+                results.append({"scenario": "home", "size": size, "filter": name,
+                                "skipped": "$text needs a real mongod (--mongo-uri)"})
+                continue
+            try:
+                r = _measure(client, path, n, clear=web.page_cache.clear)
+            except Exception as e:  # π.χ. $text σε mongomock
+                results.append({"scenario": "home", "size": size, "filter": name, "skipped": str(e)[:200]})
+                continue
+            results.append({"scenario": "home", "size": size, "filter": name, **r})
+        results.append({"scenario": "home", "size": size, "filter": "cached", **_measure(client, "/", n)})
+
+        with client.session_transaction() as s:
+            s["admin"] = True
+        results.append({"scenario": "admin", "size": size, **_measure(client, "/admin", n)})
+        with client.session_transaction() as s:
+            s.clear()
+    return results
+
+
+# ------------------ REPORT ------------------
+def _key(r: dict) -> tuple:
+    return r["scenario"], r.get("source"), r.get("size"), r.get("filter")
+
+
+def compare(old: dict, new: dict):
+    before = {_key(r): r for r in old.get("results", [])}
+    print(f"\nvs {old['meta'].get('commit', '?')[:10]} ({old['meta'].get('timestamp')})")
+    for r in new["results"]:
+        metric, higher_is_better = PRIMARY.get(r["scenario"], (None, True))
+        prev = before.get(_key(r))
+        if not metric or not prev or metric not in r or metric not in prev or not prev[metric]:
+            continue
+        change = (r[metric] - prev[metric]) / prev[metric] * 100
+        better = change > 0 if higher_is_better else change < 0
+        label = " ".join(str(x) for x in _key(r) if x is not None)
+        print(f"  {label:<40} {metric:<17} {prev[metric]:>10} -> {r[metric]:>10}  "
+              f"{change:+6.1f}% {'better' if better else 'worse'}")
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                              check=True, cwd=Path(__file__).parent).stdout.strip()
+    except Exception:
+        return None
+
+
+SIZES = [1_000, 10_000]                    # mongomock: in-memory, γραμμικά scans
+MONGO_SIZES = [10_000, 100_000, 1_000_000]  # τοπικό mongod (--mongo-uri)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmarks (fixture server + Mongo stand-in)")
+    parser.add_argument("--scenarios", nargs="+", default=["crawl", "parse", "web"],
+                        choices=["crawl", "parse", "web"])
+    parser.add_argument("--sizes", nargs="+", type=int,
+                        help="Πλήθος άρθρων για home/admin (default: 1k/10k, με --mongo-uri 10k/100k/1M)")
+    parser.add_argument("--requests", type=int, default=20, help="Requests ανά home/admin scenario")
+    parser.add_argument("--full-docs", action="store_true", help="Seed με html_content/body_text/rendered_html")
+    parser.add_argument("--pages", type=int, default=3, help="Listing σελίδες ανά crawl")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--parse-workers", type=int, default=0)
+    parser.add_argument("--latency", type=float, default=0.05, help="Latency του fixture server (sec)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Ποσοστό 503 του fixture server")
+    parser.add_argument("--parse-pages", type=int, default=50, help="parse_article calls ανά πηγή")
+    parser.add_argument("--mongo-uri", help="Τοπικό mongod αντί για mongomock")
+    parser.add_argument("--mongo-db", default="news_bench", help="Βάση του benchmark (σβήνεται!)")
+    parser.add_argument("--json", help="Αποθήκευση αποτελεσμάτων σε JSON")
+    parser.add_argument("--compare", help="Προηγούμενο JSON για σύγκριση")
+    args = parser.parse_args()
+    if not args.sizes:
+        args.sizes = MONGO_SIZES if args.mongo_uri else SIZES
+
+    # χωρίς raw store / metrics αρχεία από τα bench crawls, frontier σε προσωρινό φάκελο
+    os.environ["RAW_STORE_DIR"] = ""
+    os.environ["METRICS_DIR"] = ""
+    frontier_dir = os.environ["FRONTIER_DIR"] = tempfile.mkdtemp(prefix="bench-frontier-")
+    backend = use_mongo(args.mongo_uri, args.mongo_db)
+
+    from mongo import MongoDB
+
+    db = MongoDB()
+    logging.getLogger().setLevel(logging.WARNING)  # οι scrapers κάνουν basicConfig(INFO)
+
+    results = []
+    with FixtureServer(latency=args.latency, error_rate=args.error_rate) as server:
+        if "crawl" in args.scenarios:
+            print("crawl...")
+            results += bench_crawl(db, server, args.pages, args.concurrency, args.parse_workers)
+        if "parse" in args.scenarios:
+            print("parse...")
+            server.latency, server.error_rate = 0.0, 0.0
+            results += bench_parse(server, args.parse_pages, repeat=5)
+    if "web" in args.scenarios:
+        print("web...")
+        results += bench_web(args.sizes, args.requests, args.full_docs, text_search=bool(args.mongo_uri))
+    reset(db)
+    shutil.rmtree(frontier_dir, ignore_errors=True)
+
+    for r in results:
+        print("  " + ", ".join(f"{k}={v}" for k, v in r.items()))
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.utcnow().isoformat(),
+            "python": platform.python_version(),
+            "mongo": backend,
+            "args": vars(args),
+        },
+        "results": results,
+    }
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2, ensure_ascii=False))
+    if args.compare:
+        compare(json.loads(Path(args.compare).read_text()), report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+import threading
+from collections import OrderedDict, namedtuple
+
+# ένα rendered response: version του περιεχομένου τη στιγμή του render, strong ETag, bytes
+CachedPage = namedtuple("CachedPage", "version etag body mimetype")
+
+
+class ResponseCache:
+    """
+    Thread-safe LRU για rendered σελίδες, με όριο σε bytes (όχι σε πλήθος entries).
+    """
+
+    def __init__(self, max_bytes: int = 32 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key, entry: CachedPage) -> CachedPage:
+        if len(entry.body) > self.max_bytes:
+            return entry
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.size -= len(old.body)
+            self._entries[key] = entry
+            self.size += len(entry.body)
+            while self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted.body)
+        return entry
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def __len__(self):
+        return len(self._entries)
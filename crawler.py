@@ -0,0 +1,527 @@
+import time
+import queue
+import email.utils
+import logging
+import threading
+import multiprocessing
+from collections import defaultdict
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from itertools import islice
+from urllib.parse import urlsplit
+
+import httpclient
+import metrics
+from frontier import open_frontier
+from htmlparse import make_soup
+from mongo import derived_fields
+from rawstore import open_default_store
+
+logger = logging.getLogger("crawler")
+
+DEFAULT_CONCURRENCY = 4
+DEFAULT_PARSE_WORKERS = 0  # 0 = parse στο ίδιο process
+WRITE_BATCH_SIZE = 50
+THROTTLE_DEFAULT = 60  # sec αναμονής μετά από 429/503 χωρίς Retry-After
+
+
+def parse_retry_after(value) -> float | None:
+    """
+    Retry-After σε δευτερόλεπτα: είτε αριθμός είτε HTTP date. None αν λείπει/είναι άκυρο.
+    """
+    if not value:
+        return None
+    value = str(value).strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+
+class TokenBucket:
+    """
+    Token bucket rate limiter: `rate` αιτήματα/sec με μέγιστο burst `capacity`.
+    rate <= 0 σημαίνει χωρίς όριο.
+    """
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        self.rate = float(rate)
+        self.capacity = max(1.0, float(capacity))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        if self.rate <= 0:
+            return
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class Fetcher:
+    """
+    Bounded thread pool για GET requests.
+    Ανά host: μέχρι `concurrency` αιτήματα σε πτήση και κοινό token bucket (`rate` req/sec).
+    429/503 (αφού εξαντληθούν τα retries του session): ο host "παγώνει" για Retry-After sec,
+    τα επόμενα fetches του αποτυγχάνουν αμέσως χωρίς request. throttled/retry_after στα stats.
+    `name` (η πηγή) είναι το label των metrics. Bodies πάνω από max_bytes απορρίπτονται (httpclient.get).
+    """
+
+    def __init__(self, session, headers=None, timeout: float = 20,
+                 concurrency: int = DEFAULT_CONCURRENCY, rate: float = 1.0, name: str = "",
+                 max_bytes: int = httpclient.DEFAULT_MAX_BYTES):
+        self.session = session
+        self.name = name
+        self.max_bytes = max_bytes
+        self.headers = headers or {}
+        self.timeout = timeout
+        self.concurrency = max(1, int(concurrency))
+        self.rate = rate
+        self.pool = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="fetch")
+        self._slots = defaultdict(lambda: threading.BoundedSemaphore(self.concurrency))
+        self._buckets = defaultdict(lambda: TokenBucket(self.rate))
+        self._blocked_until = {}  # host -> monotonic
+        self._lock = threading.Lock()
+        self.fetched = 0
+        self.failures = 0
+        self.throttled = 0
+        self.retry_after = None  # το μεγαλύτερο Retry-After (sec) που είδαμε
+
+    def _count(self, ok: bool):
+        with self._lock:
+            if ok:
+                self.fetched += 1
+            else:
+                self.failures += 1
+
+    def _host(self, url: str):
+        host = urlsplit(url).netloc
+        with self._lock:
+            return self._slots[host], self._buckets[host]
+
+    def _throttle(self, url: str, resp):
+        wait_for = parse_retry_after(resp.headers.get("Retry-After"))
+        host = urlsplit(url).netloc
+        with self._lock:
+            self.throttled += 1
+            self.retry_after = max(self.retry_after or 0, wait_for or THROTTLE_DEFAULT)
+            self._blocked_until[host] = time.monotonic() + (wait_for or THROTTLE_DEFAULT)
+        logger.warning(f"Throttled by {host} ({resp.status_code}), retry after {wait_for or THROTTLE_DEFAULT:.0f}s")
+
+    def _blocked(self, url: str) -> bool:
+        with self._lock:
+            return self._blocked_until.get(urlsplit(url).netloc, 0) > time.monotonic()
+
+    def fetch(self, url: str, headers=None):
+        """
+        Blocking GET με τα όρια του host. Επιστρέφει Response (και 304) ή None σε αποτυχία.
+        """
+        slot, bucket = self._host(url)
+        with slot:
+            if self._blocked(url):
+                self._count(False)
+                metrics.FETCHES.inc(source=self.name, status="throttled")
+                return None
+            bucket.acquire()
+            started, r = time.perf_counter(), None
+            try:
+                r = httpclient.get(self.session, url, headers={**self.headers, **(headers or {})},
+                                   timeout=self.timeout, max_bytes=self.max_bytes)
+                self._observe(r, time.perf_counter() - started)
+                if r.status_code == 429 or (r.status_code == 503 and r.headers.get("Retry-After")):
+                    self._throttle(url, r)
+                r.raise_for_status()
+                self._count(True)
+                return r
+            except Exception as e:
+                if r is None:  # HTTP errors έχουν ήδη μετρηθεί με το status τους
+                    metrics.FETCH_SECONDS.observe(time.perf_counter() - started, source=self.name)
+                    metrics.FETCHES.inc(source=self.name, status="error")
+                logger.warning(f"Failed to fetch {url}: {e}")
+                self._count(False)
+                return None
+
+    def _observe(self, r, seconds: float):
+        metrics.FETCH_SECONDS.observe(seconds, source=self.name)
+        metrics.FETCHES.inc(source=self.name, status=r.status_code)
+        metrics.FETCH_BYTES.inc(len(r.content or b""), source=self.name)
+        if getattr(r, "wire_bytes", None) is not None:
+            metrics.WIRE_BYTES.inc(r.wire_bytes, source=self.name)
+        # urllib3 Retry: το history έχει μία εγγραφή ανά retry αυτού του request
+        retries = getattr(getattr(r, "raw", None), "retries", None)
+        if retries is not None and getattr(retries, "history", None):
+            metrics.RETRIES.inc(len(retries.history), source=self.name)
+
+    def submit(self, url: str, headers=None):
+        return self.pool.submit(self.fetch, url, headers)
+
+    def map(self, urls, window: int | None = None):
+        """
+        Κατεβάζει τα urls concurrently και δίνει (url, response) με σειρά ολοκλήρωσης.
+        Το πολύ `window` responses σε πτήση/αναμονή: αν ο consumer αργεί, σταματάμε να κατεβάζουμε.
+        """
+        window = window or self.concurrency * 2
+        urls = iter(urls)
+        pending = {self.submit(u): u for u in islice(urls, window)}
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                url = pending.pop(fut)
+                nxt = next(urls, None)
+                if nxt is not None:
+                    pending[self.submit(nxt)] = nxt
+                yield url, fut.result()
+
+    def close(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def parse_task(parse_fn, url: str, html):
+    """
+    Εκτελείται στο parse stage (και σε worker process): parse + derived fields,
+    ώστε όλο το CPU-bound κομμάτι να γίνεται εκτός του writer.
+    Επιστρέφει (article, sec): ο χρόνος μετριέται εδώ γιατί τα metrics του child process χάνονται.
+    """
+    started = time.perf_counter()
+    article = parse_fn(url, html)
+    if article:
+        article.update(derived_fields(article))
+    return article, time.perf_counter() - started
+
+
+class ParsePool:
+    """
+    Parse stage. workers > 0: ProcessPoolExecutor (spawn), ώστε το CPU-bound parse να μην
+    περιορίζεται από το GIL. workers == 0: parse inline, με το ίδιο API (Future).
+    Το parse_fn πρέπει να είναι module-level function (picklable), π.χ. scraper_na.parse_html.
+    """
+
+    def __init__(self, workers: int = DEFAULT_PARSE_WORKERS):
+        self.workers = max(0, int(workers or 0))
+        # πόσα parse tasks επιτρέπονται σε αναμονή πριν πιέσουμε πίσω το fetch stage
+        self.max_pending = max(1, self.workers * 2)
+        self.pool = None
+        if self.workers:
+            self.pool = ProcessPoolExecutor(max_workers=self.workers,
+                                            mp_context=multiprocessing.get_context("spawn"))
+
+    def submit(self, fn, *args) -> Future:
+        if self.pool:
+            return self.pool.submit(fn, *args)
+        fut = Future()
+        try:
+            fut.set_result(fn(*args))
+        except Exception as e:
+            fut.set_exception(e)
+        return fut
+
+    def close(self):
+        if self.pool:
+            self.pool.shutdown(wait=True, cancel_futures=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class BatchWriter:
+    """
+    Writer stage: thread που μαζεύει άρθρα (με έτοιμα derived fields, βλ. parse_task)
+    σε batches και κάνει bulk insert.
+    Bounded queue: αν η Mongo αργεί, το put() μπλοκάρει και φρενάρει το parse/fetch.
+    """
+
+    def __init__(self, db, batch_size: int = WRITE_BATCH_SIZE, max_queue: int = WRITE_BATCH_SIZE * 4,
+                 name: str = ""):
+        self.db = db
+        self.name = name
+        self.batch_size = batch_size
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.inserted = 0
+        self.duplicates = 0
+        self.failed = []
+        self.thread = threading.Thread(target=self._run, name="writer", daemon=True)
+        self.thread.start()
+
+    def put(self, article: dict):
+        self.queue.put(article)
+
+    def flush(self) -> tuple[int, int, list]:
+        """
+        Γράφει ό,τι εκκρεμεί και επιστρέφει (inserted, duplicates, failed) από το προηγούμενο flush.
+        failed: τα άρθρα που δεν γράφτηκαν (σφάλμα της Mongo, όχι duplicate).
+        """
+        done = threading.Event()
+        self.queue.put(done)
+        done.wait()
+        counts = self.inserted, self.duplicates, self.failed
+        self.inserted = self.duplicates = 0
+        self.failed = []
+        return counts
+
+    def close(self):
+        self.queue.put(None)
+        self.thread.join()
+
+    def _write(self, batch):
+        if batch:
+            with metrics.DB_SECONDS.time(source=self.name, op="bulk_insert"):
+                failed = []
+                inserted, duplicates = self.db.bulk_insert_articles(batch, derived=True, failed=failed)
+            metrics.ARTICLES.inc(inserted, source=self.name, result="inserted")
+            metrics.ARTICLES.inc(duplicates, source=self.name, result="duplicate")
+            metrics.ARTICLES.inc(len(failed), source=self.name, result="write_error")
+            self.failed.extend(failed)
+            self.inserted += inserted
+            self.duplicates += duplicates
+        return []
+
+    def _run(self):
+        batch = []
+        while True:
+            item = self.queue.get()
+            if item is None:
+                self._write(batch)
+                return
+            if isinstance(item, threading.Event):
+                batch = self._write(batch)
+                item.set()
+                continue
+            batch.append(item)
+            if len(batch) >= self.batch_size:
+                batch = self._write(batch)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def resolve_rate(rate, delay):
+    """
+    Το --rate έχει προτεραιότητα. Αλλιώς το παλιό --delay γίνεται rate = 1/delay.
+    """
+    if rate is not None:
+        return rate
+    return 1.0 / delay if delay and delay > 0 else 0
+
+
+def conditional_headers(validators) -> dict:
+    """
+    If-None-Match / If-Modified-Since από τα validators της προηγούμενης εκτέλεσης.
+    """
+    headers = {}
+    if validators and validators.get("etag"):
+        headers["If-None-Match"] = validators["etag"]
+    if validators and validators.get("last_modified"):
+        headers["If-Modified-Since"] = validators["last_modified"]
+    return headers
+
+
+def response_validators(resp) -> dict:
+    return {"etag": resp.headers.get("ETag"), "last_modified": resp.headers.get("Last-Modified")}
+
+
+def crawl_site(*, source: str, session, db, listing_url, extract_links, parse_html,
+               pages: int = 1, delay: float = 1.0, concurrency: int = DEFAULT_CONCURRENCY,
+               rate=None, headers=None, timeout: float = 20, progress=None,
+               incremental: bool = True, parse_workers: int = DEFAULT_PARSE_WORKERS) -> dict:
+    """
+    Κοινό crawl loop για όλες τις πηγές, ως streaming pipeline με bounded stages:
+    fetch (thread pool, raw bytes) -> parse (ParsePool, processes) -> write (BatchWriter, bulk inserts).
+    - Η επόμενη listing σελίδα κατεβαίνει όσο γίνεται parse η τρέχουσα.
+    - incremental: conditional GET στις listing σελίδες και stop μόλις μια σελίδα
+      είναι 304 ή έχει μόνο γνωστά άρθρα (οι listings είναι newest-first).
+    - frontier (Bloom filter στο δίσκο): links που έγιναν ήδη ingest ή δεν ήταν άρθρα
+      προσπερνιούνται πριν από το Mongo lookup· η Mongo ρωτιέται μόνο για τα υπόλοιπα.
+    Επιστρέφει stats: pages (fetched), added, duplicates, failures, throttled, retry_after, elapsed.
+    Το `progress(stats)` (αν δοθεί) καλείται μετά από κάθε listing σελίδα.
+    Στο τέλος: JSON summary των metrics του run (metrics.write_run_summary) και στο crawl_state.
+    """
+    log = logging.getLogger(source)
+    started = time.monotonic()
+    metrics_before = metrics.snapshot()
+    added = duplicates = parse_failures = write_failures = 0
+
+    state = db.get_crawl_state(source)
+    listings = state.get("listings") or {}
+    newest_url = state.get("newest_url")
+    newest_published_at = state.get("newest_published_at")
+
+    def current_stats():
+        return {
+            "source": source,
+            "pages": fetcher.fetched,
+            "added": added,
+            "duplicates": duplicates,
+            "failures": fetcher.failures + parse_failures + write_failures,
+            "throttled": fetcher.throttled,
+            "retry_after": fetcher.retry_after,
+            "elapsed": round(time.monotonic() - started, 2),
+        }
+
+    store = open_default_store()  # raw HTML κάθε fetch, για offline reparse (manage.py reparse)
+    frontier = open_frontier(source, db)
+
+    def keep_raw(url, resp, kind):
+        if store and resp is not None and resp.status_code == 200:
+            try:
+                store.put(url, resp.content, source=source, kind=kind)
+            except Exception as e:
+                log.warning(f"Raw store write failed for {url}: {e}")
+
+    def fetch_listing(page):
+        cond = conditional_headers(listings.get(str(page))) if incremental else None
+        return fetcher.submit(listing_url(page), headers=cond)
+
+    def collect(done, submitted, seen, written):
+        # parse results -> writer. Επιστρέφει πόσα parse απέτυχαν.
+        # seen: links που δεν ήταν άρθρα. written: (link, canonical) των άρθρων που πήγαν στον writer.
+        # Και τα δύο πάνε στο frontier μετά το flush της σελίδας
+        nonlocal newest_url, newest_published_at, parse_failures
+        failed = 0
+        for fut in done:
+            link = submitted.pop(fut)
+            try:
+                article, seconds = fut.result()
+            except Exception as e:
+                log.warning(f"Parse failed: {e}")
+                metrics.ARTICLES.inc(source=source, result="parse_error")
+                failed += 1
+                continue
+            metrics.PARSE_SECONDS.observe(seconds, source=source)
+            if not article or not article.get("url") or not article.get("title"):
+                metrics.ARTICLES.inc(source=source, result="not_article")
+                seen.append(link)  # non-article: δεν χρειάζεται να ξανακατέβει
+                continue
+            written.append((link, article["url"]))
+            writer.put(article)
+            # ISO strings της ίδιας πηγής: η λεξικογραφική σύγκριση αρκεί
+            if article.get("published_at") and (not newest_published_at or article["published_at"] > newest_published_at):
+                newest_url, newest_published_at = article["url"], article["published_at"]
+        parse_failures += failed
+        return failed
+
+    # try/finally: store (sqlite) και frontier (mmap) κλείνουν και όταν το crawl σκάσει,
+    # αλλιώς τα daemons (scheduler/worker) μαζεύουν ανοιχτά handles από run σε run
+    try:
+        with Fetcher(session, headers=headers, timeout=timeout, concurrency=concurrency,
+                     rate=resolve_rate(rate, delay), name=source) as fetcher, \
+                ParsePool(parse_workers) as parser, BatchWriter(db, name=source) as writer:
+            next_listing = fetch_listing(1)
+
+            for page in range(1, pages + 1):
+                resp = next_listing.result()
+                next_listing = None
+                if resp is None:
+                    if page < pages:
+                        next_listing = fetch_listing(page + 1)
+                    continue
+
+                if resp.status_code == 304:
+                    log.info(f"Listing page {page}: not modified, stopping")
+                    break
+
+                keep_raw(listing_url(page), resp, "listing")
+                links = extract_links(make_soup(resp.content))
+                log.info(f"Listing page {page}: {len(links)} links found")
+
+                # frontier πρώτα (μνήμη), μετά ένα $in query μόνο για ό,τι δεν ξέρει
+                unseen = frontier.unseen(links) if frontier else links
+                known = set()
+                if unseen:
+                    with metrics.DB_SECONDS.time(source=source, op="existing_urls"):
+                        known = db.existing_urls(unseen)
+                    if frontier and known:
+                        frontier.add_many(known)  # π.χ. από άλλο process ή πριν υπάρξει το frontier
+                new_links = [link for link in unseen if link not in known]
+                metrics.LINKS.inc(len(new_links), source=source, result="new")
+                metrics.LINKS.inc(len(known), source=source, result="known")
+                metrics.LINKS.inc(len(links) - len(unseen), source=source, result="frontier")
+
+                if incremental and not new_links:
+                    listings[str(page)] = response_validators(resp)
+                    log.info(f"Listing page {page}: all articles already known, stopping")
+                    break
+
+                # prefetch της επόμενης listing σελίδας όσο κατεβαίνουν/γίνονται parse τα άρθρα
+                if page < pages:
+                    next_listing = fetch_listing(page + 1)
+
+                # fetch -> parse: το πολύ parser.max_pending parse tasks σε αναμονή (backpressure)
+                pending = set()
+                submitted, seen, written = {}, [], []
+                page_failures = 0
+                for link, r in fetcher.map(new_links):
+                    if r is None:
+                        page_failures += 1
+                        continue
+                    keep_raw(link, r, "article")
+                    fut = parser.submit(parse_task, parse_html, link, r.content)
+                    submitted[fut] = link
+                    pending.add(fut)
+                    if len(pending) >= parser.max_pending:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        page_failures += collect(done, submitted, seen, written)
+                page_failures += collect(wait(pending).done, submitted, seen, written)
+
+                # duplicates (π.χ. canonical URL που υπάρχει ήδη) τα απορρίπτει το unique index
+                inserted, dup, failed = writer.flush()
+                added += inserted
+                duplicates += dup
+                write_failures += len(failed)
+                page_failures += len(failed)
+                log.info(f"Listing page {page}: inserted {inserted}, duplicates {dup}, write errors {len(failed)}")
+                # μόνο μετά το flush και μόνο ό,τι γράφτηκε (inserted ή duplicate): ένα άρθρο που
+                # απέτυχε στη Mongo δεν πρέπει να κρυφτεί από το frontier στο επόμενο run
+                if frontier:
+                    lost = {a["url"] for a in failed}
+                    frontier.add_many(seen)
+                    for link, url in written:
+                        if url not in lost:
+                            frontier.add_many((link, url))
+
+                # validators μόνο αν η σελίδα ολοκληρώθηκε, αλλιώς ένα 304 θα έκρυβε τα αποτυχημένα άρθρα
+                if not page_failures:
+                    listings[str(page)] = response_validators(resp)
+
+                if progress:
+                    progress(current_stats())
+    finally:
+        if store:
+            store.close()
+        if frontier:
+            frontier.close()
+
+    stats = current_stats()
+    run_metrics = metrics.run_summary(metrics_before, metrics.snapshot(), source=source)
+    metrics.write_run_summary(source, {"stats": stats, "metrics": run_metrics})
+
+    db.save_crawl_state(source, {
+        "listings": listings,
+        "newest_url": newest_url,
+        "newest_published_at": newest_published_at,
+        "last_run": {"stats": stats, "metrics": run_metrics},
+    })
+
+    log.info(f"Done. Added {added} new articles.")
+    return stats
@@ -0,0 +1,156 @@
+import os
+import math
+import mmap
+import struct
+import hashlib
+import logging
+from pathlib import Path
+
+from requests.utils import requote_uri
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DIR = "data/frontier"
+DEFAULT_CAPACITY = 1_000_000   # URLs ανά πηγή πριν μεγαλώσει το αρχείο (~3.6 MB με το default error rate)
+DEFAULT_ERROR_RATE = 1e-6      # false positive = ένα νέο link που θα θεωρηθεί γνωστό
+
+MAGIC = b"NFBLOOM1"
+# magic, bits, hashes, capacity, count
+HEADER = struct.Struct("<8sQIQQ")
+HEADER_SIZE = 64
+
+
+def _hashes(url: str) -> tuple[int, int]:
+    # ίδιο key για /άρθρο/ (link στο listing) και /%CE%AC.../ (canonical στη Mongo)
+    digest = hashlib.blake2b(requote_uri(url).encode("utf-8"), digest_size=16).digest()
+    return int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+
+
+class Frontier:
+    """
+    Persistent seen-set μιας πηγής: Bloom filter σε αρχείο, mmap (MAP_SHARED).
+    Κρατά τα URLs που έχουν ήδη γίνει ingest (link και canonical) και όσα δεν ήταν άρθρα,
+    ώστε το crawl να τα προσπερνά χωρίς Mongo query και χωρίς fetch.
+    "Όχι" είναι πάντα σωστό. "Ναι" έχει πιθανότητα λάθους ~error_rate. Η αυθεντική
+    πηγή μένει το unique index της Mongo.
+    Το bit-set γίνεται in place: δύο processes (worker/scheduler) στην ίδια πηγή βλέπουν
+    τις εγγραφές του άλλου. Ένα χαμένο bit σε race σημαίνει απλώς ένα Mongo lookup παραπάνω.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.file = open(self.path, "r+b")
+        self.mm = mmap.mmap(self.file.fileno(), 0)
+        magic, self.bits, self.hashes, self.capacity, _ = HEADER.unpack_from(self.mm, 0)
+        if magic != MAGIC or len(self.mm) < HEADER_SIZE + (self.bits + 7) // 8:
+            self.close()
+            raise ValueError(f"{self.path}: not a frontier file")
+
+    @classmethod
+    def create(cls, path, capacity: int = DEFAULT_CAPACITY, error_rate: float = DEFAULT_ERROR_RATE):
+        """
+        Νέο άδειο filter για capacity URLs (atomic: tmp αρχείο + replace).
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        bits = max(64, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        hashes = max(1, round(bits / capacity * math.log(2)))
+        tmp = path.with_suffix(path.suffix + ".tmp")
+        with open(tmp, "wb") as f:
+            f.write(HEADER.pack(MAGIC, bits, hashes, capacity, 0).ljust(HEADER_SIZE, b"\0"))
+            f.truncate(HEADER_SIZE + (bits + 7) // 8)  # sparse: μηδενικά bits
+        tmp.replace(path)
+        return cls(path)
+
+    @property
+    def count(self) -> int:
+        return HEADER.unpack_from(self.mm, 0)[4]
+
+    @property
+    def full(self) -> bool:
+        return self.count >= self.capacity
+
+    def error_rate(self) -> float:
+        """
+        Εκτιμώμενη πιθανότητα false positive με το τρέχον πλήθος.
+        """
+        return (1 - math.exp(-self.hashes * self.count / self.bits)) ** self.hashes
+
+    def _positions(self, url: str):
+        h1, h2 = _hashes(url)
+        return ((h1 + i * h2) % self.bits for i in range(self.hashes))
+
+    def __contains__(self, url: str) -> bool:
+        mm = self.mm
+        return all(mm[HEADER_SIZE + (pos >> 3)] & (1 << (pos & 7)) for pos in self._positions(url))
+
+    def add(self, url: str) -> bool:
+        """
+        True αν το url ήταν νέο (άλλαξε τουλάχιστον ένα bit).
+        """
+        mm, new = self.mm, False
+        for pos in self._positions(url):
+            i, bit = HEADER_SIZE + (pos >> 3), 1 << (pos & 7)
+            if not mm[i] & bit:
+                mm[i] |= bit
+                new = True
+        if new:
+            HEADER.pack_into(mm, 0, MAGIC, self.bits, self.hashes, self.capacity, self.count + 1)
+        return new
+
+    def add_many(self, urls) -> int:
+        return sum(self.add(url) for url in urls if url)
+
+    def unseen(self, urls) -> list[str]:
+        return [url for url in urls if url not in self]
+
+    def flush(self):
+        self.mm.flush()
+
+    def close(self):
+        if not self.mm.closed:
+            self.mm.flush()
+            self.mm.close()
+        self.file.close()
+
+
+def rebuild(path, db, source: str, capacity: int = DEFAULT_CAPACITY) -> Frontier:
+    """
+    Νέο filter με τα URLs της πηγής από τη Mongo (τα γνωστά non-article links χάνονται:
+    θα ξαναμαθευτούν στο επόμενο crawl).
+    """
+    urls = [d["url"] for d in db.iter_articles({"source_key": source}, ("url",)) if d.get("url")]
+    frontier = Frontier.create(path, capacity=max(capacity, 2 * len(urls)))
+    frontier.add_many(urls)
+    frontier.flush()
+    logger.info("Frontier %s: %d URLs from Mongo", source, len(urls))
+    return frontier
+
+
+def frontier_path(source: str, root: str | None = None) -> Path:
+    return Path(root if root is not None else os.getenv("FRONTIER_DIR", DEFAULT_DIR)) / f"{source}.bloom"
+
+
+def open_frontier(source: str, db=None) -> Frontier | None:
+    """
+    FRONTIER_DIR (default data/frontier). Κενό FRONTIER_DIR το απενεργοποιεί.
+    Χωρίς αρχείο (πρώτο run) ή γεμάτο filter: rebuild από τη Mongo, με διπλάσιο capacity.
+    """
+    if not os.getenv("FRONTIER_DIR", DEFAULT_DIR):
+        return None
+    path = frontier_path(source)
+    try:
+        frontier = Frontier(path) if path.exists() else None
+        if frontier is not None and not frontier.full:
+            return frontier
+        capacity = DEFAULT_CAPACITY
+        if frontier is not None:
+            capacity = 2 * frontier.capacity
+            logger.info("Frontier %s full (%d URLs), growing to %d", source, frontier.count, capacity)
+            frontier.close()
+        if db is None:
+            return Frontier.create(path, capacity)
+        return rebuild(path, db, source, capacity)
+    except Exception:
+        logger.exception("Frontier unavailable (%s), crawling without it", path)
+        return None
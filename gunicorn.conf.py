@@ -0,0 +1,66 @@
+"""
+Production serving του web: gunicorn -c gunicorn.conf.py
+Ρυθμίσεις από env: PORT, WEB_CONCURRENCY (processes), WEB_THREADS (threads ανά process),
+WEB_TIMEOUT, WEB_GRACEFUL_TIMEOUT, WEB_MAX_REQUESTS. Mongo pool/timeouts: MONGO_* (mongo.client_options).
+METRICS_SHARED_DIR: κοινός φάκελος των workers για το /metrics (default στο tmp).
+"""
+import logging
+import multiprocessing
+import os
+import tempfile
+
+wsgi_app = "wsgi:app"
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+
+# processes για τα cores (render/JSON είναι CPU-bound), threads για την αναμονή της Mongo
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count() * 2 + 1))
+worker_class = "gthread"
+threads = int(os.getenv("WEB_THREADS", 4))
+
+# import μία φορά στον master και copy-on-write στους workers. Ασφαλές γιατί το import
+# δεν ανοίγει MongoClient (app.get_db: μετά το fork, ένας ανά worker).
+preload_app = True
+
+# /metrics: κάθε worker γράφει τα metrics του εδώ και όποιος απαντά τα αθροίζει όλα
+os.environ.setdefault("METRICS_SHARED_DIR", os.path.join(tempfile.gettempdir(), "news-web-metrics"))
+
+# ένα pool ανά worker: όσα connections όσα threads (+ περιθώριο), όχι το default 100 x workers
+os.environ.setdefault("MONGO_MAX_POOL_SIZE", str(threads * 2))
+
+timeout = int(os.getenv("WEB_TIMEOUT", 30))
+graceful_timeout = int(os.getenv("WEB_GRACEFUL_TIMEOUT", 20))
+keepalive = 5
+# περιοδικό recycle των workers (memory growth), με jitter ώστε να μη γίνονται όλοι μαζί
+max_requests = int(os.getenv("WEB_MAX_REQUESTS", 2000))
+max_requests_jitter = max_requests // 10
+
+accesslog = "-"
+errorlog = "-"
+
+
+def on_starting(server):
+    """
+    Indexes μία φορά στον master, πριν το fork: οι workers δεν τα ξαναφτιάχνουν στο πρώτο request.
+    Αν η Mongo δεν απαντά, το web ξεκινά κανονικά (το /readyz δείχνει 503 μέχρι να συνδεθεί).
+    """
+    from jobs import JobQueue
+    from mongo import MongoDB
+    import metrics
+
+    metrics.clear_shared()  # νέο server: counters από το μηδέν (όπως μετά από restart)
+    try:
+        db = MongoDB(wait=False)
+        JobQueue(db)
+        db.close()
+    except Exception:
+        logging.getLogger("gunicorn.error").exception("Index setup skipped")
+
+
+def worker_exit(server, worker):
+    """
+    Τελευταίο snapshot του worker (recycle από max_requests ή shutdown): δεν χάνονται τα
+    requests μετά το τελευταίο περιοδικό dump.
+    """
+    import metrics
+
+    metrics.dump_process()
@@ -0,0 +1,60 @@
+import os
+import logging
+
+from bs4 import BeautifulSoup, FeatureNotFound
+
+logger = logging.getLogger(__name__)
+
+# διαθέσιμα backends, από το γρηγορότερο. Το html.parser (stdlib) είναι πάντα διαθέσιμο.
+BACKENDS = ("lxml", "html.parser")
+
+
+def available_backends() -> list[str]:
+    found = []
+    for name in BACKENDS:
+        try:
+            BeautifulSoup("<p></p>", name)
+            found.append(name)
+        except FeatureNotFound:
+            continue
+    return found
+
+
+def _default_backend() -> str:
+    wanted = os.getenv("HTML_PARSER")
+    backends = available_backends()
+    if wanted and wanted not in backends:
+        logger.warning("HTML_PARSER=%s not available, using %s", wanted, backends[0])
+    return wanted if wanted in backends else backends[0]
+
+
+DEFAULT_BACKEND = _default_backend()
+
+
+def make_soup(html, parser: str | None = None) -> BeautifulSoup:
+    """
+    BeautifulSoup με το γρηγορότερο διαθέσιμο parser (lxml), αλλιώς html.parser.
+    Override: HTML_PARSER env ή το `parser` argument.
+    """
+    return BeautifulSoup(html, parser or DEFAULT_BACKEND)
+
+
+def collect_meta(soup: BeautifulSoup) -> dict:
+    """
+    Ένα πέρασμα σε όλα τα <meta>: {property ή name: content}. Κρατάμε την πρώτη τιμή
+    (όπως το soup.find), ώστε τα og:*/article:*/description να μη θέλουν find το καθένα.
+    """
+    meta = {}
+    for tag in soup.find_all("meta"):
+        key = tag.get("property") or tag.get("name")
+        content = tag.get("content")
+        if key and content and content.strip() and key not in meta:
+            meta[key] = content.strip()
+    return meta
+
+
+def node_text(node) -> str:
+    """
+    Ορατό κείμενο ενός node (ίδια μορφή με το textnorm.html_to_text).
+    """
+    return node.get_text(" ", strip=True)
@@ -0,0 +1,104 @@
+import logging
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import MaxRetryError, ResponseError
+from urllib3.util.request import ACCEPT_ENCODING
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+USER_AGENT = "NewsAggregatorBot/1.0 (+project)"
+DEFAULT_POOL_SIZE = 4           # connections ανά host (= crawl concurrency)
+DEFAULT_MAX_BYTES = 5 * 1024 * 1024  # decoded body: μεγαλύτερες σελίδες απορρίπτονται
+MAX_RETRY_AFTER = 30            # sec: μεγαλύτερο Retry-After => χωρίς retry, το χειρίζεται ο Fetcher
+CHUNK_SIZE = 64 * 1024
+
+
+class BodyTooLarge(Exception):
+    pass
+
+
+class PoliteRetry(Retry):
+    """
+    Retry για transient errors (429/5xx) με backoff. Ένα 429/503 με μεγάλο Retry-After δεν
+    περιμένουμε μέσα στο fetch thread: επιστρέφεται στον caller (Fetcher "παγώνει" τον host).
+    """
+
+    def increment(self, method=None, url=None, response=None, error=None, _pool=None, _stacktrace=None):
+        if response is not None and response.status in self.RETRY_AFTER_STATUS_CODES:
+            retry_after = self.get_retry_after(response)
+            if retry_after is not None and retry_after > MAX_RETRY_AFTER:
+                # με raise_on_status=False η urllib3 επιστρέφει το response αντί για exception
+                raise MaxRetryError(_pool, url, ResponseError(f"Retry-After {retry_after:.0f}s"))
+        return super().increment(method, url, response, error, _pool, _stacktrace)
+
+
+def retry_policy() -> Retry:
+    """
+    Κοινή πολιτική retries/backoff για όλες τις πηγές.
+    """
+    return PoliteRetry(
+        total=3,
+        connect=3,
+        read=3,
+        backoff_factor=0.5,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=("GET",),
+        raise_on_status=False,
+    )
+
+
+def make_session(pool_size: int = DEFAULT_POOL_SIZE, hosts: int = 4) -> requests.Session:
+    """
+    Ένα session για όλους τους scrapers:
+    - pool_size connections ανά host (ίσο με το concurrency του crawl: καμία connection δεν
+      ανοίγει και πετιέται), keep-alive, pool ανά host για `hosts` hosts
+    - Accept-Encoding gzip/deflate (+br/zstd αν είναι εγκατεστημένα τα brotli/zstandard)
+    - κοινό retry/backoff (retry_policy)
+    """
+    session = requests.Session()
+    session.headers.update({
+        "User-Agent": USER_AGENT,
+        "Accept-Encoding": ACCEPT_ENCODING,
+        "Connection": "keep-alive",
+    })
+    adapter = HTTPAdapter(
+        pool_connections=max(1, hosts),
+        pool_maxsize=max(1, pool_size),
+        pool_block=True,
+        max_retries=retry_policy(),
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def get(session, url: str, headers=None, timeout: float = 20, max_bytes: int = DEFAULT_MAX_BYTES):
+    """
+    GET με streaming body και όριο μεγέθους (μετά το decompression, άρα και για gzip bombs).
+    Επιστρέφει Response με έτοιμο .content. BodyTooLarge αν ξεπεραστεί το max_bytes:
+    η connection κλείνει χωρίς να κατέβει το υπόλοιπο.
+    `r.wire_bytes`: bytes που ήρθαν από το δίκτυο (συμπιεσμένα), όταν είναι γνωστά.
+    """
+    r = session.get(url, headers=headers, timeout=timeout, stream=True)
+    try:
+        length = r.headers.get("Content-Length")
+        if max_bytes and length and length.isdigit() and int(length) > max_bytes:
+            raise BodyTooLarge(f"{url}: Content-Length {length} > {max_bytes}")
+        chunks, size = [], 0
+        for chunk in r.iter_content(CHUNK_SIZE):
+            size += len(chunk)
+            if max_bytes and size > max_bytes:
+                raise BodyTooLarge(f"{url}: body > {max_bytes} bytes")
+            chunks.append(chunk)
+    except BaseException:
+        r.close()
+        raise
+    r._content = b"".join(chunks)
+    r._content_consumed = True
+    try:
+        r.wire_bytes = r.raw.tell()
+    except Exception:
+        r.wire_bytes = None
+    return r
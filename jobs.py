@@ -0,0 +1,154 @@
+import logging
+from datetime import datetime, timedelta
+
+from bson.objectid import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+logger = logging.getLogger(__name__)
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+ENQUEUE_ATTEMPTS = 3                    # insert/find γύροι όταν ίδιο job τελειώνει/μπαίνει ταυτόχρονα
+HEARTBEAT_EVERY = 30                    # sec: ο worker ανανεώνει το heartbeat_at του job που τρέχει
+HEARTBEAT_TIMEOUT = timedelta(minutes=3)  # χωρίς heartbeat τόση ώρα: ο worker θεωρείται νεκρός
+
+
+def _now() -> str:
+    return datetime.utcnow().isoformat()
+
+
+def job_key(sources, pages: int, delay: float) -> str:
+    """
+    Ίδιες παράμετροι => ίδιο key. Όσο ένα job είναι queued/running, δεύτερο ίδιο δεν μπαίνει.
+    """
+    return f"scrape:{','.join(sorted(sources or [])) or 'all'}:{pages}:{delay}"
+
+
+class JobQueue:
+    """
+    Persistent ουρά scraping jobs στη Mongo (collection `jobs`).
+    Το web app κάνει μόνο enqueue/status, τα crawls τα τρέχει το worker.py.
+    """
+
+    def __init__(self, db):
+        self.jobs = db.db.jobs
+        self._ensure_indexes()
+
+    def _ensure_indexes(self):
+        try:
+            # unique μόνο όσο το job είναι ενεργό (το active_key σβήνεται στο τέλος)
+            self.jobs.create_index("active_key", unique=True, sparse=True)
+            self.jobs.create_index([("status", 1), ("created_at", 1)])
+        except Exception:
+            logger.exception("Job index creation failed")
+
+    def enqueue(self, sources=None, pages: int = 1, delay: float = 1.0):
+        """
+        Επιστρέφει (job_id, created). Αν τρέχει ήδη ίδιο job, επιστρέφει εκείνο με created=False.
+        """
+        key = job_key(sources, pages, delay)
+        doc = {
+            "kind": "scrape",
+            "params": {"sources": sources or None, "pages": pages, "delay": delay},
+            "status": QUEUED,
+            "active_key": key,
+            "progress": {},
+            "created_at": _now(),
+            "updated_at": _now(),
+        }
+        for attempt in range(ENQUEUE_ATTEMPTS):
+            try:
+                return self.jobs.insert_one(doc).inserted_id, True
+            except DuplicateKeyError:
+                existing = self.jobs.find_one({"active_key": key}, {"_id": 1})
+                if existing:
+                    return existing["_id"], False
+                # τελείωσε ανάμεσα στο insert και στο find (και ίσως μπήκε άλλο): ξανά από την αρχή
+                if attempt == ENQUEUE_ATTEMPTS - 1:
+                    raise
+
+    def is_active(self, source: str) -> bool:
+        """
+        Υπάρχει queued/running job (με active_key) για την πηγή ή για όλες τις πηγές;
+        """
+        return self.jobs.find_one(
+            {"active_key": {"$exists": True}, "$or": [{"params.sources": source}, {"params.sources": None}]},
+            {"_id": 1},
+        ) is not None
+
+    def claim(self, worker_id: str | None = None):
+        """
+        Ατομικά παίρνει το παλαιότερο queued job (ασφαλές με πολλούς workers).
+        Το job κρατά το worker_id και heartbeat_at, που ο worker ανανεώνει με heartbeat().
+        """
+        now = _now()
+        return self.jobs.find_one_and_update(
+            {"status": QUEUED},
+            {"$set": {"status": RUNNING, "worker_id": worker_id, "heartbeat_at": now,
+                      "started_at": now, "updated_at": now}},
+            sort=[("created_at", 1)],
+            return_document=ReturnDocument.AFTER,
+        )
+
+    def heartbeat(self, job_id, worker_id: str | None = None) -> bool:
+        """
+        False αν το job δεν είναι πια running σε αυτόν τον worker (π.χ. το έκανε failed το fail_stale).
+        """
+        res = self.jobs.update_one(
+            {"_id": job_id, "status": RUNNING, "worker_id": worker_id},
+            {"$set": {"heartbeat_at": _now()}},
+        )
+        return res.matched_count > 0
+
+    def report_progress(self, job_id, source: str, stats: dict):
+        self.jobs.update_one(
+            {"_id": job_id},
+            {"$set": {f"progress.{source}": stats, "updated_at": _now()}},
+        )
+
+    def finish(self, job_id, results=None, error: str | None = None):
+        self.jobs.update_one(
+            {"_id": job_id},
+            {
+                "$set": {
+                    "status": FAILED if error else DONE,
+                    "results": results or [],
+                    "error": error,
+                    "finished_at": _now(),
+                    "updated_at": _now(),
+                },
+                "$unset": {"active_key": ""},
+            },
+        )
+
+    def fail_stale(self, max_age: timedelta = HEARTBEAT_TIMEOUT) -> int:
+        """
+        Running jobs χωρίς heartbeat για max_age (έπεσε ο worker που τα κρατά) σημειώνονται failed,
+        ώστε να ελευθερωθεί το active_key. Jobs χωρίς heartbeat_at (claim από παλιότερο worker)
+        κρίνονται από το updated_at.
+        """
+        cutoff = (datetime.utcnow() - max_age).isoformat()
+        res = self.jobs.update_many(
+            {
+                "status": RUNNING,
+                "$or": [
+                    {"heartbeat_at": {"$lt": cutoff}},
+                    {"heartbeat_at": None, "updated_at": {"$lt": cutoff}},
+                ],
+            },
+            {
+                "$set": {"status": FAILED, "error": "stale (worker stopped)", "finished_at": _now(), "updated_at": _now()},
+                "$unset": {"active_key": ""},
+            },
+        )
+        return res.modified_count
+
+    def get(self, job_id):
+        try:
+            return self.jobs.find_one({"_id": ObjectId(job_id)})
+        except Exception:
+            return None
+
+    def recent(self, limit: int = 10):
+        return list(self.jobs.find().sort("created_at", -1).limit(limit))
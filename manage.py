@@ -0,0 +1,172 @@
+import argparse
+import logging
+from concurrent.futures import FIRST_COMPLETED, wait
+
+import frontier
+from crawler import ParsePool, parse_task
+from mongo import MongoDB, ARCHIVE_DAYS
+from rawstore import RawStore, DEFAULT_DIR
+
+logger = logging.getLogger("manage")
+logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+
+def cmd_backfill(args):
+    """
+    Συμπληρώνει/ξαναϋπολογίζει τα derived fields (search, source_key/category_key/tag_keys,
+    body_text/word_count/excerpt/content_hash κτλ) στα υπάρχοντα άρθρα.
+    Τρέχει μία φορά μετά από κάθε αλλαγή στα derived fields (--missing: μόνο όσα λείπουν).
+    """
+    db = MongoDB()
+    n = db.backfill_derived(batch_size=args.batch_size, missing_only=args.missing)
+    logger.info(f"Backfill done: {n} articles")
+    n = db.backfill_archive_search(batch_size=args.batch_size)
+    if n:
+        logger.info(f"Archive search fields: {n} articles")
+
+
+def cmd_stories(args):
+    """
+    Ξαναχτίζει τα story_id (near-duplicate clusters) όλων των άρθρων. Μετά το backfill.
+    """
+    n = MongoDB().backfill_stories(batch_size=args.batch_size)
+    logger.info(f"Stories assigned: {n} articles")
+
+
+def cmd_rerender(args):
+    """
+    Sanitize/render του html_content σε rendered_html. Default: μόνο όσα έχουν παλιό render_version.
+    """
+    n = MongoDB().rerender_articles(batch_size=args.batch_size, stale_only=not args.all)
+    logger.info(f"Re-rendered {n} articles")
+
+
+def cmd_archive(args):
+    """
+    Μετακινεί τα άρθρα παλαιότερα από --days μέρες στο articles_archive (συμπιεσμένο html_content).
+    Μένουν προσβάσιμα από τη σελίδα του άρθρου και από αναζητήσεις με εύρος ημερομηνιών.
+    """
+    n = MongoDB().archive_articles(days=args.days, batch_size=args.batch_size, limit=args.limit)
+    logger.info(f"Archived {n} articles")
+
+
+def cmd_facets(args):
+    """
+    Ξαναχτίζει τα facet counts (πηγές/κατηγορίες) από τα άρθρα.
+    """
+    n = MongoDB().rebuild_facets()
+    logger.info(f"Facets rebuilt: {n} values")
+
+
+def cmd_frontier(args):
+    """
+    Κατάσταση του frontier ανά πηγή. --rebuild: νέο filter από τα URLs της Mongo
+    (π.χ. αν ένα non-article link έγινε άρθρο, ή μετά από restore της βάσης).
+    """
+    from scraperall import SOURCES
+
+    db = MongoDB() if args.rebuild else None
+    for source in args.source or list(SOURCES):
+        path = frontier.frontier_path(source, args.dir)
+        if args.rebuild:
+            f = frontier.rebuild(path, db, source)
+        elif path.exists():
+            f = frontier.Frontier(path)
+        else:
+            logger.info(f"{source}: no frontier at {path}")
+            continue
+        logger.info(f"{source}: {f.count}/{f.capacity} URLs, {path.stat().st_size / 1e6:.1f} MB, "
+                    f"false positive rate ~{f.error_rate():.1e}")
+        f.close()
+
+
+def cmd_reparse(args):
+    """
+    Περνάει όλο το raw store από τους τρέχοντες parsers και ενημερώνει τη Mongo σε bulk.
+    Χωρίς network: χρήσιμο μετά από αλλαγή selectors.
+    """
+    from scraperall import PARSERS
+
+    db = MongoDB()
+    store = RawStore(args.store)
+    updated = parsed = failed = 0
+    batch = []
+
+    def collect(done):
+        nonlocal parsed, failed, updated, batch
+        for fut in done:
+            try:
+                article, _ = fut.result()
+            except Exception as e:
+                logger.warning(f"Parse failed: {e}")
+                failed += 1
+                continue
+            if not article or not article.get("title"):
+                continue
+            parsed += 1
+            batch.append(article)
+        if len(batch) >= args.batch_size:
+            updated += db.bulk_update_articles(batch, derived=True)
+            batch = []
+
+    with ParsePool(args.parse_workers) as parser:
+        pending = set()
+        for url, source, html in store.iter_pages(source=args.source):
+            parse_fn = PARSERS.get(source)
+            if not parse_fn:
+                continue
+            pending.add(parser.submit(parse_task, parse_fn, url, html))
+            if len(pending) >= parser.max_pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done)
+        collect(wait(pending).done)
+
+    if batch:
+        updated += db.bulk_update_articles(batch, derived=True)
+    store.close()
+    db.rebuild_facets()
+    logger.info(f"Reparse done: {parsed} parsed, {updated} updated, {failed} failed")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Εργασίες συντήρησης βάσης")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("backfill", help="Derived fields σε υπάρχοντα άρθρα")
+    p.add_argument("--batch-size", type=int, default=500)
+    p.add_argument("--missing", action="store_true", help="Μόνο άρθρα χωρίς τα precomputed πεδία κειμένου")
+    p.set_defaults(func=cmd_backfill)
+
+    p = sub.add_parser("stories", help="Near-duplicate clustering (story_id) σε υπάρχοντα άρθρα")
+    p.add_argument("--batch-size", type=int, default=500)
+    p.set_defaults(func=cmd_stories)
+
+    p = sub.add_parser("rerender", help="Sanitized rendered_html για τη σελίδα άρθρου")
+    p.add_argument("--batch-size", type=int, default=200)
+    p.add_argument("--all", action="store_true", help="Όλα τα άρθρα, όχι μόνο όσα έχουν παλιό render_version")
+    p.set_defaults(func=cmd_rerender)
+
+    p = sub.add_parser("archive", help="Tiering: παλιά άρθρα στο articles_archive")
+    p.add_argument("--days", type=int, default=ARCHIVE_DAYS, help="Πόσες μέρες μένουν στο hot collection")
+    p.add_argument("--batch-size", type=int, default=500)
+    p.add_argument("--limit", type=int, default=None, help="Το πολύ τόσα άρθρα σε αυτό το run")
+    p.set_defaults(func=cmd_archive)
+
+    p = sub.add_parser("facets", help="Rebuild των facet counts")
+    p.set_defaults(func=cmd_facets)
+
+    p = sub.add_parser("frontier", help="Seen-set (Bloom filter) ανά πηγή: κατάσταση ή rebuild από τη Mongo")
+    p.add_argument("--source", nargs="+", help="Πηγές (default: όλες)")
+    p.add_argument("--dir", default=None, help="Φάκελος των filters (default: FRONTIER_DIR ή data/frontier)")
+    p.add_argument("--rebuild", action="store_true", help="Ξαναχτίζει τα filters από τα URLs της Mongo")
+    p.set_defaults(func=cmd_frontier)
+
+    p = sub.add_parser("reparse", help="Offline reparse από το raw HTML store")
+    p.add_argument("--source", help="Μόνο αυτή η πηγή")
+    p.add_argument("--store", default=DEFAULT_DIR, help="Φάκελος του raw store")
+    p.add_argument("--batch-size", type=int, default=500)
+    p.add_argument("--parse-workers", type=int, default=0, help="Processes για parse (0 = στο ίδιο process)")
+    p.set_defaults(func=cmd_reparse)
+
+    args = parser.parse_args()
+    args.func(args)
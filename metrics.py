@@ -0,0 +1,346 @@
+import os
+import json
+import time
+import bisect
+import logging
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+from pymongo import monitoring
+
+logger = logging.getLogger(__name__)
+
+# sec: από γρήγορο Mongo query μέχρι αργό fetch
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+DEFAULT_DIR = "data/metrics"
+SHARE_INTERVAL = 5  # sec: κάθε πόσο ένα process γράφει τα metrics του στο METRICS_SHARED_DIR
+
+REGISTRY = {}  # name -> metric, με τη σειρά δήλωσης
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _label_str(names, values, extra=()) -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in list(zip(names, values)) + list(extra)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+        REGISTRY[name] = self
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels.get(name, "")) for name in self.labels)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {k: (dict(v, buckets=list(v["buckets"])) if isinstance(v, dict) else v)
+                    for k, v in self._values.items()}
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self, values=None):
+        for key, value in sorted((self.snapshot() if values is None else values).items()):
+            yield f"{self.name}{_label_str(self.labels, key)} {value}"
+
+    @staticmethod
+    def merge(a, b):
+        return a + b
+
+
+class Histogram(_Metric):
+    """
+    Prometheus-style histogram: counts ανά bucket (όχι cumulative εσωτερικά), sum, count.
+    """
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = {"buckets": [0] * (len(self.buckets) + 1), "sum": 0.0, "count": 0}
+            entry["buckets"][i] += 1
+            entry["sum"] += value
+            entry["count"] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def quantile(self, entry: dict, q: float) -> float | None:
+        """
+        Εκτίμηση quantile από τα buckets (το άνω όριο του bucket όπου πέφτει).
+        """
+        if not entry["count"]:
+            return None
+        target, seen = q * entry["count"], 0
+        for bound, n in zip(self.buckets + (float("inf"),), entry["buckets"]):
+            seen += n
+            if seen >= target:
+                return bound if bound != float("inf") else self.buckets[-1]
+        return self.buckets[-1]
+
+    @staticmethod
+    def merge(a: dict, b: dict) -> dict:
+        return {
+            "buckets": [x + y for x, y in zip(a["buckets"], b["buckets"])],
+            "sum": a["sum"] + b["sum"],
+            "count": a["count"] + b["count"],
+        }
+
+    def render(self, values=None):
+        for key, entry in sorted((self.snapshot() if values is None else values).items()):
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), entry["buckets"]):
+                cumulative += n
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                yield f"{self.name}_bucket{_label_str(self.labels, key, [('le', le)])} {cumulative}"
+            yield f"{self.name}_sum{_label_str(self.labels, key)} {entry['sum']:.6f}"
+            yield f"{self.name}_count{_label_str(self.labels, key)} {entry['count']}"
+
+
+# ---- crawler hot path (fetch -> parse -> dedup -> write), label source ----
+FETCH_SECONDS = Histogram("crawler_fetch_seconds", "GET latency (incl. retries)", ("source",))
+FETCHES = Counter("crawler_fetches_total", "GETs by outcome (HTTP status or error)", ("source", "status"))
+FETCH_BYTES = Counter("crawler_fetch_bytes_total", "Downloaded body bytes (decoded)", ("source",))
+WIRE_BYTES = Counter("crawler_wire_bytes_total", "Body bytes on the wire (compressed)", ("source",))
+RETRIES = Counter("crawler_retries_total", "Retries done by the session's Retry adapter", ("source",))
+PARSE_SECONDS = Histogram("crawler_parse_seconds", "parse_html + derived fields per article", ("source",))
+LINKS = Counter("crawler_links_total", "Article links on listings: new, known (Mongo) or skipped by the frontier",
+                ("source", "result"))
+ARTICLES = Counter("crawler_articles_total", "Articles by outcome", ("source", "result"))
+DB_SECONDS = Histogram("crawler_db_seconds", "Mongo time of the crawl loop", ("source", "op"))
+
+# ---- web app ----
+HTTP_SECONDS = Histogram("http_request_seconds", "Flask request latency", ("endpoint", "method", "status"))
+MONGO_SECONDS = Histogram("mongo_command_seconds", "Mongo command latency (CommandListener)", ("command",))
+MONGO_ERRORS = Counter("mongo_command_errors_total", "Failed Mongo commands", ("command",))
+
+
+class MongoTimer(monitoring.CommandListener):
+    """
+    Χρόνος κάθε Mongo command (find, insert, update, aggregate...) στο MONGO_SECONDS.
+    """
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        MONGO_SECONDS.observe(event.duration_micros / 1e6, command=event.command_name)
+
+    def failed(self, event):
+        MONGO_SECONDS.observe(event.duration_micros / 1e6, command=event.command_name)
+        MONGO_ERRORS.inc(command=event.command_name)
+
+
+def render_prometheus(values: dict | None = None) -> str:
+    """
+    values: snapshot (π.χ. shared_snapshot() όλων των gunicorn workers). None: μόνο αυτό το process.
+    """
+    lines = []
+    for metric in REGISTRY.values():
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        lines.extend(metric.render(None if values is None else values.get(metric.name, {})))
+    return "\n".join(lines) + "\n"
+
+
+def snapshot() -> dict:
+    return {name: metric.snapshot() for name, metric in REGISTRY.items()}
+
+
+# ---- πολλά processes (gunicorn workers): ένα αρχείο ανά pid σε κοινό φάκελο ----
+# Κάθε worker γράφει το snapshot του κάθε SHARE_INTERVAL και στο exit (gunicorn.conf.py). Το
+# /metrics αθροίζει όλα τα αρχεία, οπότε οι counters δεν "πηδάνε" ανάλογα με τον worker που
+# απαντά. Τα αρχεία workers που τερμάτισαν (max_requests) μένουν: το άθροισμα δεν μικραίνει.
+
+_sharing = {"pid": None}
+
+
+def shared_dir() -> str:
+    """
+    METRICS_SHARED_DIR (το ορίζει το gunicorn.conf.py). Κενό: metrics μόνο ανά process.
+    """
+    return os.getenv("METRICS_SHARED_DIR", "")
+
+
+def dump_process(root: str | None = None):
+    root = root if root is not None else shared_dir()
+    if not root:
+        return
+    data = {name: [[list(key), value] for key, value in values.items()] for name, values in snapshot().items()}
+    path = os.path.join(root, f"{os.getpid()}.json")
+    try:
+        os.makedirs(root, exist_ok=True)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(path + ".tmp", path)
+    except OSError as e:
+        logger.warning("Metrics not shared (%s): %s", path, e)
+
+
+def share_process(interval: float = SHARE_INTERVAL):
+    """
+    Ξεκινά (μία φορά ανά process, και μετά από fork) το thread που γράφει τα metrics στο
+    METRICS_SHARED_DIR. Φθηνό: καλείται σε κάθε request.
+    """
+    if not shared_dir() or _sharing["pid"] == os.getpid():
+        return
+    _sharing["pid"] = os.getpid()
+
+    def loop():
+        while True:
+            time.sleep(interval)
+            dump_process()
+
+    threading.Thread(target=loop, name="metrics-share", daemon=True).start()
+
+
+def shared_snapshot(root: str | None = None) -> dict:
+    """
+    Άθροισμα των snapshots όλων των processes του κοινού φακέλου. Για το τρέχον process
+    μετράει η live τιμή, όχι το (έως SHARE_INTERVAL παλιό) αρχείο του.
+    """
+    root = root if root is not None else shared_dir()
+    total = snapshot()
+    own = f"{os.getpid()}.json"
+    try:
+        names = [n for n in os.listdir(root) if n.endswith(".json") and n != own]
+    except OSError:
+        return total
+    for name in names:
+        try:
+            with open(os.path.join(root, name), encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            continue
+        for metric_name, rows in data.items():
+            metric = REGISTRY.get(metric_name)
+            if metric is None:
+                continue
+            values = total.setdefault(metric_name, {})
+            for key, value in rows:
+                key = tuple(key)
+                values[key] = metric.merge(values[key], value) if key in values else value
+    return total
+
+
+def clear_shared(root: str | None = None):
+    """
+    Άδειασμα του κοινού φακέλου (gunicorn master στην εκκίνηση: νέοι counters από το μηδέν).
+    """
+    root = root if root is not None else shared_dir()
+    if not root or not os.path.isdir(root):
+        return
+    for name in os.listdir(root):
+        if name.endswith((".json", ".tmp")):
+            try:
+                os.unlink(os.path.join(root, name))
+            except OSError:
+                pass
+
+
+def run_summary(before: dict, after: dict, **match) -> dict:
+    """
+    Διαφορά δύο snapshots, μόνο για τα series με labels == match (π.χ. source="kathimerini").
+    Counters: {labels: τιμή}. Histograms: {labels: count/sum/mean/p50/p95}.
+    """
+    summary = {}
+    for name, metric in REGISTRY.items():
+        if any(label not in metric.labels for label in match):
+            continue
+        rows = {}
+        for key, value in after.get(name, {}).items():
+            labels = dict(zip(metric.labels, key))
+            if any(labels.get(k) != str(v) for k, v in match.items()):
+                continue
+            rest = ",".join(f"{k}={v}" for k, v in labels.items() if k not in match) or "all"
+            old = before.get(name, {}).get(key)
+            if metric.kind == "counter":
+                delta = value - (old or 0)
+                if delta:
+                    rows[rest] = delta
+                continue
+            old = old or {"buckets": [0] * len(value["buckets"]), "sum": 0.0, "count": 0}
+            entry = {
+                "buckets": [a - b for a, b in zip(value["buckets"], old["buckets"])],
+                "sum": value["sum"] - old["sum"],
+                "count": value["count"] - old["count"],
+            }
+            if entry["count"]:
+                rows[rest] = {
+                    "count": entry["count"],
+                    "sum": round(entry["sum"], 4),
+                    "mean": round(entry["sum"] / entry["count"], 4),
+                    "p50": metric.quantile(entry, 0.5),
+                    "p95": metric.quantile(entry, 0.95),
+                }
+        if rows:
+            summary[name] = rows
+    return summary
+
+
+def write_run_summary(name: str, summary: dict) -> str | None:
+    """
+    JSON ανά run στο METRICS_DIR (default data/metrics). Κενό METRICS_DIR το απενεργοποιεί.
+    """
+    root = os.getenv("METRICS_DIR", DEFAULT_DIR)
+    if not root:
+        return None
+    path = os.path.join(root, f"{name}-{datetime.utcnow():%Y%m%dT%H%M%S%f}.json")
+    try:
+        os.makedirs(root, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+    except OSError as e:
+        logger.warning("Metrics summary not written (%s): %s", path, e)
+        return None
+    return path
+
+
+def render_run_summaries(summaries: dict) -> str:
+    """
+    Τα τελευταία per-run summaries (από άλλα processes: worker/scheduler) ως gauges
+    crawler_last_run_*{source=...}, ώστε να φαίνονται στο ίδιο /metrics με το web.
+    """
+    lines = []
+    for source, summary in sorted(summaries.items()):
+        for name, rows in summary.items():
+            base = "crawler_last_run_" + name.removeprefix("crawler_")
+            for rest, value in rows.items():
+                extra = [] if rest == "all" else [tuple(kv.split("=", 1)) for kv in rest.split(",")]
+                labels = _label_str(("source",), (source,), extra)
+                if isinstance(value, dict):
+                    for stat in ("count", "mean", "p95"):
+                        if value.get(stat) is not None:
+                            lines.append(f"{base}_{stat}{labels} {value[stat]}")
+                else:
+                    lines.append(f"{base}{labels} {value}")
+    return "\n".join(lines) + "\n" if lines else ""
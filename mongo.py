@@ -1,30 +1,350 @@
 import os
+import re
+import json
 import time
+import zlib
+import heapq
+import base64
+import hashlib
 import logging
-from datetime import datetime
+from datetime import datetime, timedelta
+from itertools import islice
 
-from pymongo import MongoClient
-from pymongo.errors import DuplicateKeyError, ServerSelectionTimeoutError, OperationFailure
+from bson.objectid import ObjectId
+from pymongo import MongoClient, ReplaceOne, ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError, ServerSelectionTimeoutError, OperationFailure
+from requests.utils import requote_uri
+
+from textnorm import normalize, html_to_text, excerpt
+import simhash
+import metrics
+from sanitize import render_fields, RENDER_VERSION
+
+try:
+    import zstandard
+except ImportError:  # optional: χωρίς zstandard το archive συμπιέζεται με zlib
+    zstandard = None
 
 logger = logging.getLogger(__name__)
 
+DUPLICATE_KEY = 11000
+
+# projections: οι λίστες δεν φορτώνουν ποτέ html_content
+CARD_FIELDS = ("title", "summary", "excerpt", "image_url", "tags", "published_at", "source", "category", "story_id")
+ADMIN_FIELDS = ("title", "published_at", "category", "source")
+# /api: πεδία που μπορεί να ζητήσει ένας consumer (?fields=), και τα πεδία των feeds
+API_FIELDS = ("title", "url", "summary", "excerpt", "image_url", "tags", "published_at", "source", "category",
+              "story_id", "word_count", "content_hash", "body_text", "rendered_html", "created_at")
+FEED_FIELDS = ("title", "url", "summary", "excerpt", "published_at", "source", "category", "tags")
+# σελίδα άρθρου: το έτοιμο rendered_html αντί για html_content/body_text
+ARTICLE_FIELDS = ("title", "summary", "image_url", "tags", "published_at", "source", "category", "url",
+                  "rendered_html", "render_version")
+
+EXCERPT_CHARS = 240  # μήκος του excerpt (preview στα cards όταν λείπει το summary)
+
+# facets (dropdowns του home) με counts, συντηρούνται incrementally σε κάθε write
+FACET_FIELDS = ("source", "category")
+FACET_TTL = 60  # sec: άλλα processes (scrapers) γράφουν στο facets collection, όχι στο cache μας
+
+# content version (αλλάζει σε κάθε write): κλειδί για τα caches του web app.
+# Τα άλλα processes (scrapers) το αυξάνουν στη Mongo, το web το ξαναδιαβάζει το πολύ ανά τόσα sec.
+CONTENT_VERSION_TTL = 5
+
+# near-duplicates: νέο άρθρο ψάχνει "ίδια είδηση" μόνο σε όσα μπήκαν τις τελευταίες μέρες
+STORY_WINDOW_DAYS = 3
+# collapse σε σελίδες: το fetch διπλασιάζεται ως limit x τόσο για να φανεί το όριο της σελίδας
+COLLAPSE_MAX_FETCH = 16
+
+# βάρη relevance για το text index
+SEARCH_WEIGHTS = {"search.title": 10, "search.summary": 4, "search.body": 1}
+
+# tiering: το `articles` κρατά τις τελευταίες ARCHIVE_DAYS μέρες, τα παλαιότερα πάνε στο `articles_archive`
+ARCHIVE_DAYS = 90
+# στο archive: συμπιεσμένα τα μεγάλα πεδία κειμένου, χωρίς ό,τι χρειάζεται μόνο στο hot
+# (LSH bands για stories, rendered_html: γίνεται render στην προβολή)
+ARCHIVE_COMPRESSED_FIELDS = ("html_content", "body_text")
+ARCHIVE_DROP_FIELDS = ("simhash_bands", "rendered_html", "render_version")
+# από το search.* μένουν μόνο τα μικρά πεδία: αναζήτηση στο archive με match (χωρίς text index)
+ARCHIVE_SEARCH_FIELDS = ("title", "summary")
+
+
+def encode_cursor(doc: dict) -> str:
+    """
+    Opaque cursor για keyset pagination: (published_at, _id) του άρθρου.
+    """
+    raw = json.dumps([doc.get("published_at"), str(doc["_id"])])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str | None):
+    """
+    Επιστρέφει (published_at, ObjectId) ή None αν το cursor λείπει/είναι άκυρο.
+    Το published_at πρέπει να είναι string ή null: οτιδήποτε άλλο (αριθμός, object) θα έμπαινε
+    αυτούσιο στο query. Η μορφή δεν ελέγχεται: παλιά άρθρα μπορεί να έχουν μη-ISO published_at
+    (ελεύθερο κείμενο από το admin) και το cursor τους πρέπει να δουλεύει.
+    """
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        published_at, oid = json.loads(raw)
+        if published_at is not None and not isinstance(published_at, str):
+            return None
+        return published_at, ObjectId(oid)
+    except Exception:
+        return None
+
+
+def _keyset_filter(cursor, older: bool) -> dict:
+    """
+    Άρθρα μετά (older=True) ή πριν (older=False) από το cursor στη σειρά (published_at, _id) desc.
+    Τα άρθρα χωρίς published_at (null) είναι στο τέλος της λίστας.
+    """
+    published_at, oid = cursor
+    if older:
+        if published_at is None:
+            return {"published_at": None, "_id": {"$lt": oid}}
+        return {"$or": [
+            {"published_at": {"$lt": published_at}},
+            {"published_at": published_at, "_id": {"$lt": oid}},
+            {"published_at": None},
+        ]}
+    if published_at is None:
+        return {"$or": [
+            {"published_at": {"$ne": None}},
+            {"published_at": None, "_id": {"$gt": oid}},
+        ]}
+    return {"$or": [
+        {"published_at": {"$gt": published_at}},
+        {"published_at": published_at, "_id": {"$gt": oid}},
+    ]}
+
+
+def _facet_ops(docs, delta: int):
+    """
+    $inc ανά (field, value) για τα docs: ένα upsert ανά διαφορετική τιμή.
+    """
+    counts = {}
+    for doc in docs:
+        for field in FACET_FIELDS:
+            value = doc.get(field)
+            if value:
+                counts[(field, value)] = counts.get((field, value), 0) + delta
+    return [
+        UpdateOne(
+            {"_id": f"{field}:{value}"},
+            {"$inc": {"count": n}, "$setOnInsert": {"field": field, "value": value}},
+            upsert=True,
+        )
+        for (field, value), n in counts.items()
+        if n
+    ]
+
+
+def _projection(fields):
+    return {f: 1 for f in fields} if fields else None
+
+
+def derived_fields(article: dict) -> dict:
+    """
+    Πεδία που υπολογίζονται μία φορά στο ingest (insert/update/backfill).
+    search.*: κανονικοποιημένο κείμενο (χωρίς τόνους, casefold) για το text index,
+    γιατί η Mongo δεν έχει stemming/accent folding για ελληνικά.
+    *_key / tag_keys: κανονικοποιημένα φίλτρα ώστε τα queries να είναι equality (index-friendly).
+    simhash / simhash_bands: fingerprint τίτλου+κειμένου και LSH keys για near-duplicate lookup.
+    body_text / word_count / excerpt / content_hash: το κείμενο του html_content μία φορά,
+    ώστε κανείς downstream να μη ξανακάνει parse. Αν ο parser έδωσε ήδη body_text (από το ίδιο
+    node του body), δεν ξαναδιαβάζουμε το HTML.
+    rendered_html / render_version: sanitized fragment για τη σελίδα του άρθρου (βλ. sanitize.py).
+    """
+    body_text = article.get("body_text")
+    if body_text is None:
+        body_text = html_to_text(article.get("html_content"))
+    fingerprint = simhash.simhash(f"{article.get('title') or ''} {body_text}")
+    return {
+        "source_key": normalize(article.get("source")) or None,
+        "category_key": normalize(article.get("category")) or None,
+        "tag_keys": sorted({normalize(t) for t in article.get("tags") or [] if normalize(t)}),
+        "search": {
+            "title": normalize(article.get("title")),
+            "summary": normalize(article.get("summary")),
+            "body": normalize(body_text),
+        },
+        "simhash": simhash.to_hex(fingerprint) if fingerprint is not None else None,
+        "simhash_bands": simhash.bands(fingerprint) if fingerprint is not None else [],
+        "body_text": body_text,
+        "word_count": len(body_text.split()),
+        "excerpt": excerpt(body_text, EXCERPT_CHARS),
+        "content_hash": hashlib.sha256(normalize(body_text).encode("utf-8")).hexdigest() if body_text else None,
+        **render_fields(article),
+    }
+
+
+def collapse_stories(items, limit: int):
+    """
+    Κρατά το πρώτο άρθρο κάθε story_id μέχρι `limit`. Επιστρέφει (kept, consumed):
+    consumed = πόσα items "καταναλώθηκαν" (για το σωστό cursor της επόμενης σελίδας).
+    Μετά το limit καταναλώνονται και τα επόμενα άρθρα ήδη γνωστών stories, ώστε το όριο
+    της σελίδας να πέφτει πριν από νέο story και όχι στη μέση ενός.
+    """
+    kept, seen, consumed = [], set(), 0
+    for item in items:
+        story = item.get("story_id")
+        duplicate = bool(story) and story in seen
+        if len(kept) >= limit and not duplicate:
+            break
+        consumed += 1
+        if duplicate:
+            continue
+        seen.add(story)
+        kept.append(item)
+    return kept, consumed
+
+
+def _compress(data: bytes) -> bytes:
+    return zstandard.ZstdCompressor(level=10).compress(data) if zstandard else zlib.compress(data, 6)
+
+
+def _decompress(data: bytes, method: str) -> bytes:
+    if method == "zstd":
+        if not zstandard:
+            raise RuntimeError("zstandard is required to read zstd-compressed archived articles")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return zlib.decompress(data)
+
+
+def archive_doc(doc: dict) -> dict:
+    """
+    Το document όπως γράφεται στο archive: ίδιο _id/url/μεταδεδομένα, συμπιεσμένα
+    html_content/body_text (πεδίο `compression`), χωρίς τα πεδία που χρειάζεται μόνο το hot.
+    """
+    doc = {k: v for k, v in doc.items() if k not in ARCHIVE_DROP_FIELDS}
+    doc["search"] = archive_search(doc)
+    for field in ARCHIVE_COMPRESSED_FIELDS:
+        if isinstance(doc.get(field), str):
+            doc[field] = _compress(doc[field].encode("utf-8"))
+    doc["compression"] = "zstd" if zstandard else "zlib"
+    doc["archived_at"] = datetime.utcnow().isoformat()
+    return doc
+
+
+def archive_search(doc: dict) -> dict:
+    """
+    search.title/search.summary του archive (κανονικοποιημένα όπως στο derived_fields).
+    """
+    return {field: normalize(doc.get(field)) for field in ARCHIVE_SEARCH_FIELDS}
+
+
+def archive_text_filter(text: str) -> dict:
+    """
+    Το q για το archive: κάθε λέξη (κανονικοποιημένη) ως substring σε search.title/search.summary,
+    με OR όπως το $text. Unanchored regex, άρα μόνο μαζί με εύρος ημερομηνιών (index στο published_at).
+    """
+    words = normalize(text).split()
+    return {"$or": [{f"search.{field}": {"$regex": re.escape(w)}} for w in words for field in ARCHIVE_SEARCH_FIELDS]}
+
+
+def restore_archived(doc: dict | None) -> dict | None:
+    """
+    Αντίστροφο του archive_doc για ό,τι διαβάστηκε: αποσυμπίεση, `archived: True` για το UI.
+    """
+    if doc is None:
+        return None
+    method = doc.pop("compression", None)
+    for field in ARCHIVE_COMPRESSED_FIELDS:
+        if isinstance(doc.get(field), bytes):
+            doc[field] = _decompress(doc[field], method).decode("utf-8")
+    doc.pop("archived_at", None)
+    doc["archived"] = True
+    return doc
+
+
+def has_date_range(query) -> bool:
+    """
+    Ρητό εύρος ημερομηνιών (published_at) στο query: μόνο τότε ρωτιέται και το archive.
+    """
+    return isinstance((query or {}).get("published_at"), dict)
+
+
+def searches_archive(query) -> bool:
+    """
+    Ρωτιέται και το archive; Μόνο με ρητό εύρος ημερομηνιών. Με q, το archive (χωρίς text
+    index) ψάχνεται με match σε search.title/search.summary (archive_text_filter) μέσα στο εύρος.
+    """
+    return has_date_range(query)
+
+
+def _newest_first(doc: dict):
+    return doc.get("published_at") or "", doc["_id"]
+
+
+def _merge_sorted(cursors, newest_first: bool = True):
+    # cursors ήδη ταξινομημένα (published_at, _id): streaming merge, όπως ένα ενιαίο sort
+    return heapq.merge(*cursors, key=_newest_first, reverse=newest_first)
+
+
+# env -> MongoClient option (pool / timeouts σε ms). Ό,τι δεν ορίζεται μένει στο default του driver.
+CLIENT_OPTIONS_ENV = {
+    "MONGO_MAX_POOL_SIZE": "maxPoolSize",
+    "MONGO_MIN_POOL_SIZE": "minPoolSize",
+    "MONGO_MAX_IDLE_TIME_MS": "maxIdleTimeMS",
+    "MONGO_WAIT_QUEUE_TIMEOUT_MS": "waitQueueTimeoutMS",
+    "MONGO_CONNECT_TIMEOUT_MS": "connectTimeoutMS",
+    "MONGO_SOCKET_TIMEOUT_MS": "socketTimeoutMS",
+    "MONGO_SERVER_SELECTION_TIMEOUT_MS": "serverSelectionTimeoutMS",
+}
+
+_indexed = set()  # (uri, db) όπου έγιναν ήδη τα indexes σε αυτό το process (π.χ. στον gunicorn master)
+
+
+def client_options() -> dict:
+    # μικρό server selection timeout για να μη “κρεμάει” request
+    options = {"serverSelectionTimeoutMS": 3000}
+    for env, option in CLIENT_OPTIONS_ENV.items():
+        value = os.getenv(env)
+        if value:
+            options[option] = int(value)
+    return options
+
 
 class MongoDB:
-    def __init__(self, uri=None, db_name=None):
+    def __init__(self, uri=None, db_name=None, wait: bool = True):
+        """
+        wait=False: χωρίς ping/retries στην αρχή (web: ο client συνδέεται στο πρώτο command
+        και το /readyz δείχνει αν η Mongo απαντά).
+        """
         # παίρνει από env (Docker) αλλιώς fallback για local
         self.uri = uri or os.getenv("MONGO_URI", "mongodb://localhost:27017/")
         self.db_name = db_name or os.getenv("MONGO_DB", "news_db")
 
-        # μικρό timeout για να μη “κρεμάει” request
-        self.client = MongoClient(self.uri, serverSelectionTimeoutMS=3000)
+        # MongoTimer: latency κάθε command στο metrics.MONGO_SECONDS
+        self.client = MongoClient(self.uri, event_listeners=[metrics.MongoTimer()], **client_options())
         self.db = self.client[self.db_name]
         self.articles = self.db.articles
+        # παλιά άρθρα (archive_articles): μόνο για direct lookups και ρητά date ranges
+        self.archive = self.db.articles_archive
+        # incremental crawling: high-water marks / ETags ανά πηγή (_id = source)
+        self.crawl_state = self.db.crawl_state
+        # scheduler.py: interval / last run / next run ανά πηγή (_id = source)
+        self.schedule = self.db.schedule
+        self.facets = self.db.facets
+        self._facet_cache = {}
+        self.meta = self.db.meta
+        self._version = (0.0, None)  # (monotonic της τελευταίας ανάγνωσης, τιμή)
 
         # περίμενε λίγο να σηκωθεί η Mongo (πολύ χρήσιμο στο docker-compose)
-        self._wait_for_mongo()
+        if wait:
+            self._wait_for_mongo()
 
-        # indexes (ασφαλώς)
-        self._ensure_indexes()
+        # indexes (ασφαλώς), μία φορά ανά process
+        if (self.uri, self.db_name) not in _indexed and self._ensure_indexes():
+            _indexed.add((self.uri, self.db_name))
+
+    def ping(self):
+        self.client.admin.command("ping")
+
+    def close(self):
+        self.client.close()
 
     def _wait_for_mongo(self, retries: int = 10, delay: float = 0.8):
         for i in range(retries):
@@ -39,23 +359,53 @@ class MongoDB:
         # αν μετά από retries δεν είναι έτοιμη, το αφήνουμε να σκάσει καθαρά
         raise ServerSelectionTimeoutError(f"MongoDB not reachable at {self.uri}")
 
-    def _ensure_indexes(self):
+    def _ensure_indexes(self) -> bool:
         try:
+            self.facets.create_index([("field", 1), ("value", 1)])
             self.articles.create_index("url", unique=True)
             self.articles.create_index("published_at")
             self.articles.create_index("category")
             self.articles.create_index("source")
             self.articles.create_index("tags")
+            # LSH index για near-duplicates (multikey: ένα entry ανά band)
+            self.articles.create_index("simhash_bands")
+            # εύρεση άρθρων με rendered_html παλιάς έκδοσης (rerender)
+            self.articles.create_index("render_version")
+            # keyset pagination: sort (published_at, _id) desc κατευθείαν από το index.
+            # Τα ADMIN_FIELDS στο τέλος => covering index για τον πίνακα του admin.
+            self.articles.create_index(
+                [("published_at", -1), ("_id", -1)] + [(f, 1) for f in ADMIN_FIELDS if f != "published_at"],
+                name="admin_listing",
+            )
+            # filtered "latest N": equality στο key + walk του (published_at, _id) μέσα στο index
+            self.articles.create_index([("source_key", 1), ("published_at", -1), ("_id", -1)])
+            self.articles.create_index([("category_key", 1), ("published_at", -1), ("_id", -1)])
+            self.articles.create_index([("tag_keys", 1), ("published_at", -1), ("_id", -1)])
+            self.archive.create_index("url", unique=True)
+            self.archive.create_index([("published_at", -1), ("_id", -1)])
+            for key in ("source_key", "category_key", "tag_keys"):
+                self.archive.create_index([(key, 1), ("published_at", -1), ("_id", -1)])
+            # full-text search: language "none" (χωρίς stemming), το folding γίνεται στο normalize()
+            self.articles.create_index(
+                [(field, "text") for field in SEARCH_WEIGHTS],
+                weights=SEARCH_WEIGHTS,
+                default_language="none",
+                name="search_text",
+            )
+            return True
         except OperationFailure:
             # δεν πρέπει να ρίχνει όλο το app αν υπάρχει πρόβλημα σε index
             logger.exception("Index creation failed (OperationFailure)")
         except Exception:
             logger.exception("Index creation failed")
+        return False
 
     def insert_article(self, article) -> bool:
-        doc = {**article, "created_at": datetime.utcnow().isoformat()}
+        doc = {**article, **derived_fields(article), "created_at": datetime.utcnow().isoformat()}
         try:
+            self._assign_stories([doc])
             self.articles.insert_one(doc)
+            self._articles_changed(added=[doc])
             return True
         except DuplicateKeyError:
             return False
@@ -63,14 +413,543 @@ class MongoDB:
             logger.exception("Insert failed")
             return False
 
+    def bulk_insert_articles(self, articles, derived: bool = False, failed: list | None = None) -> tuple[int, int]:
+        """
+        Unordered insert_many: ένα round-trip για όλη τη λίστα.
+        Τα duplicates (unique url) αγνοούνται ανά document. Επιστρέφει (inserted, duplicates).
+        derived=True: τα άρθρα έχουν ήδη τα derived_fields (π.χ. από το parse stage του crawler).
+        failed: αν δοθεί λίστα, προστίθενται εκεί τα docs που δεν γράφτηκαν (ούτε inserted ούτε duplicate).
+        """
+        now = datetime.utcnow().isoformat()
+        docs = [{**a, **({} if derived else derived_fields(a)), "created_at": now} for a in articles]
+        if not docs:
+            return 0, 0
+        try:
+            self._assign_stories(docs)
+            result = self.articles.insert_many(docs, ordered=False)
+            self._articles_changed(added=docs)
+            return len(result.inserted_ids), 0
+        except BulkWriteError as e:
+            errors = e.details.get("writeErrors", [])
+            duplicates = sum(1 for err in errors if err.get("code") == DUPLICATE_KEY)
+            if len(errors) > duplicates:
+                logger.error("Bulk insert: %s non-duplicate errors", len(errors) - duplicates)
+            if failed is not None:
+                failed.extend(docs[err["index"]] for err in errors if err.get("code") != DUPLICATE_KEY)
+            rejected = {err.get("index") for err in errors}
+            self._articles_changed(added=[d for i, d in enumerate(docs) if i not in rejected])
+            return e.details.get("nInserted", 0), duplicates
+        except Exception:
+            logger.exception("Bulk insert failed")
+            if failed is not None:
+                failed.extend(docs)
+            return 0, 0
+
+    def _assign_stories(self, docs, since: str | None = None):
+        """
+        story_id για κάθε doc: το story ενός υπάρχοντος άρθρου σε SimHash απόσταση <= MAX_DISTANCE,
+        αλλιώς νέο story (= το _id του). Ένα indexed $in στα simhash_bands για όλο το batch,
+        οπότε το κόστος δεν εξαρτάται από το μέγεθος του collection.
+        """
+        for d in docs:
+            d.setdefault("_id", ObjectId())
+
+        if since is None:
+            since = (datetime.utcnow() - timedelta(days=STORY_WINDOW_DAYS)).isoformat()
+        keys = {b for d in docs for b in d.get("simhash_bands") or []}
+
+        by_band = {}  # band -> [(fingerprint, story_id)]
+
+        def remember(fp, story_id):
+            for b in simhash.bands(fp):
+                by_band.setdefault(b, []).append((fp, story_id))
+
+        if keys:
+            query = {"simhash_bands": {"$in": list(keys)}, "story_id": {"$ne": None}, "created_at": {"$gte": since}}
+            for c in self.articles.find(query, {"simhash": 1, "story_id": 1}):
+                remember(simhash.from_hex(c["simhash"]), c["story_id"])
+
+        for d in docs:
+            d["story_id"] = str(d["_id"])
+            if not d.get("simhash"):
+                continue
+            fp = simhash.from_hex(d["simhash"])
+            for b in d["simhash_bands"]:
+                match = next((sid for other, sid in by_band.get(b, ()) if simhash.distance(fp, other) <= simhash.MAX_DISTANCE), None)
+                if match:
+                    d["story_id"] = match
+                    break
+            # και τα επόμενα docs του ίδιου batch βλέπουν αυτό
+            remember(fp, d["story_id"])
+
+    def backfill_stories(self, batch_size: int = 500) -> int:
+        """
+        Ξαναϋπολογίζει τα story_id όλων των άρθρων με σειρά created_at (χρειάζεται πρώτα backfill_derived).
+        """
+        self.articles.update_many({}, {"$set": {"story_id": None}})
+        fields = {"simhash": 1, "simhash_bands": 1, "created_at": 1}
+        done, batch = 0, []
+
+        def flush(batch):
+            # backfill: χωρίς χρονικό παράθυρο, υποψήφια είναι όσα πήραν ήδη story_id
+            self._assign_stories(batch, since="")
+            ops = [UpdateOne({"_id": d["_id"]}, {"$set": {"story_id": d["story_id"]}}) for d in batch]
+            self.articles.bulk_write(ops, ordered=False)
+            return len(batch)
+
+        for doc in self.articles.find({}, fields).sort([("created_at", 1), ("_id", 1)]).batch_size(batch_size):
+            batch.append(doc)
+            if len(batch) >= batch_size:
+                done += flush(batch)
+                batch = []
+        if batch:
+            done += flush(batch)
+        self._bump_content_version()
+        return done
+
+    def update_article(self, article_id, data: dict) -> bool:
+        """
+        $set των πεδίων + επανυπολογισμός των derived fields πάνω στο ενημερωμένο άρθρο.
+        """
+        _id = ObjectId(article_id)
+        current = self.articles.find_one({"_id": _id})
+        if not current:
+            return False
+        merged = {**current, **data}
+        if "body_text" not in data:
+            merged.pop("body_text", None)  # το αποθηκευμένο κείμενο είναι του παλιού html_content
+        self.articles.update_one({"_id": _id}, {"$set": {**data, **derived_fields(merged)}})
+        self._articles_changed(added=[merged], removed=[current])
+        return True
+
+    def bulk_update_articles(self, articles, derived: bool = False) -> int:
+        """
+        Ενημέρωση υπαρχόντων άρθρων κατά url (χωρίς upsert), ένα bulk_write για όλη τη λίστα.
+        Για reparse: γράφει τα πεδία του parser + derived fields. Επιστρέφει πόσα άλλαξαν.
+        """
+        ops = [
+            UpdateOne({"url": a["url"]}, {"$set": {**a, **({} if derived else derived_fields(a))}})
+            for a in articles
+            if a.get("url")
+        ]
+        if not ops:
+            return 0
+        result = self.articles.bulk_write(ops, ordered=False)
+        if result.modified_count:
+            self._facet_cache.clear()
+            self._bump_content_version()
+        return result.modified_count
+
+    def delete_article(self, article_id) -> bool:
+        _id = ObjectId(article_id)
+        doc = self.articles.find_one_and_delete({"_id": _id}, {f: 1 for f in FACET_FIELDS})
+        if not doc:
+            return False
+        self._articles_changed(removed=[doc])
+        return True
+
+    def _articles_changed(self, added=(), removed=()):
+        """
+        Κοινό hook μετά από κάθε write: ενημέρωση facet counts + invalidation του τοπικού cache.
+        Τα facets είναι δευτερεύοντα: ένα σφάλμα εδώ δεν ακυρώνει το write.
+        """
+        ops = _facet_ops(added, +1) + _facet_ops(removed, -1)
+        try:
+            if ops:
+                self.facets.bulk_write(ops, ordered=False)
+        except Exception:
+            logger.exception("Facet update failed")
+        self._facet_cache.clear()
+        self._bump_content_version()
+
+    def _bump_content_version(self):
+        try:
+            doc = self.meta.find_one_and_update(
+                {"_id": "content_version"},
+                {"$inc": {"value": 1}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER,
+            )
+            self._version = (time.monotonic(), doc["value"])
+        except Exception:
+            logger.exception("Content version bump failed")
+
+    def content_version(self, max_age: float = CONTENT_VERSION_TTL) -> int:
+        """
+        Τρέχουσα έκδοση περιεχομένου. Διαβάζεται από τη Mongo το πολύ μία φορά ανά max_age sec,
+        ώστε τα cache hits (και τα 304) να μην κάνουν query.
+        """
+        checked_at, value = self._version
+        if value is not None and time.monotonic() - checked_at < max_age:
+            return value
+        doc = self.meta.find_one({"_id": "content_version"})
+        value = doc["value"] if doc else 0
+        self._version = (time.monotonic(), value)
+        return value
+
+    def rebuild_facets(self) -> int:
+        """
+        Ξαναχτίζει το facets collection από την αρχή (aggregation). Για backfill/επιδιόρθωση.
+        """
+        docs = []
+        for field in FACET_FIELDS:
+            pipeline = [
+                {"$match": {field: {"$nin": [None, ""]}}},
+                {"$group": {"_id": f"${field}", "count": {"$sum": 1}}},
+            ]
+            for row in self.articles.aggregate(pipeline):
+                docs.append({"_id": f"{field}:{row['_id']}", "field": field, "value": row["_id"], "count": row["count"]})
+        self.facets.delete_many({})
+        if docs:
+            self.facets.insert_many(docs)
+        self._facet_cache.clear()
+        return len(docs)
+
+    def facet_counts(self, field: str, _rebuilt: bool = False):
+        """
+        [(value, count)] ταξινομημένα κατά value. In-process cache με TTL (FACET_TTL),
+        που καθαρίζει αμέσως σε writes από αυτό το process.
+        """
+        cached = self._facet_cache.get(field)
+        if cached and cached[0] > time.monotonic():
+            return cached[1]
+
+        rows = self.facets.find({"field": field, "count": {"$gt": 0}}).sort("value", 1)
+        values = [(d["value"], d["count"]) for d in rows]
+        if not values and not _rebuilt and not self.facets.estimated_document_count() \
+                and self.articles.find_one({}, {"_id": 1}):
+            # πρώτη φορά σε υπάρχουσα βάση: χτίσε τα facets μία φορά. Αν κανένα άρθρο δεν έχει
+            # source/category, το rebuild δεν γράφει τίποτα: άδεια λίστα, όχι νέο rebuild
+            self.rebuild_facets()
+            return self.facet_counts(field, _rebuilt=True)
+
+        self._facet_cache[field] = (time.monotonic() + FACET_TTL, values)
+        return values
+
+    def backfill_derived(self, batch_size: int = 500, missing_only: bool = False) -> int:
+        """
+        Ξαναϋπολογίζει τα derived fields σε όλα τα άρθρα, σε batches (bulk_write).
+        missing_only: μόνο όσα δεν έχουν ακόμη τα precomputed πεδία κειμένου (content_hash).
+        """
+        fields = {"title": 1, "summary": 1, "html_content": 1, "source": 1, "category": 1, "tags": 1}
+        query = {"content_hash": {"$exists": False}} if missing_only else {}
+        ops, done = [], 0
+        for doc in self.articles.find(query, fields, batch_size=batch_size):
+            ops.append(UpdateOne({"_id": doc["_id"]}, {"$set": derived_fields(doc)}))
+            if len(ops) >= batch_size:
+                self.articles.bulk_write(ops, ordered=False)
+                done += len(ops)
+                ops = []
+                logger.info("Backfill: %s articles", done)
+        if ops:
+            self.articles.bulk_write(ops, ordered=False)
+            done += len(ops)
+        if done:
+            self._bump_content_version()  # άλλαξαν body_text/excerpt/rendered_html των cached σελίδων
+        return done
+
+    def get_article(self, article_id, fields=None, archive: bool = False):
+        """
+        Ένα άρθρο με όλα τα πεδία (ή μόνο τα `fields`). None για άκυρο/άγνωστο id.
+        archive: αν δεν είναι στο hot collection, ψάχνει και στο archive (αποσυμπιεσμένο).
+        """
+        try:
+            _id = ObjectId(article_id)
+        except Exception:
+            return None
+        doc = self.articles.find_one({"_id": _id}, _projection(fields))
+        if doc is None and archive:
+            doc = self.get_archived_article(_id, fields)
+        return doc
+
+    def get_archived_article(self, article_id, fields=None):
+        """
+        Ένα άρθρο μόνο από το archive (αποσυμπιεσμένο). None για άκυρο/άγνωστο id.
+        """
+        try:
+            _id = ObjectId(article_id)
+        except Exception:
+            return None
+        return restore_archived(self.archive.find_one({"_id": _id}, self._archive_projection(fields)))
+
+    @staticmethod
+    def _archive_projection(fields):
+        projection = _projection(fields)
+        if projection and any(f in projection for f in ARCHIVE_COMPRESSED_FIELDS):
+            projection["compression"] = 1
+        return projection
+
+    def get_rendered_article(self, article_id):
+        """
+        Άρθρο για τη σελίδα προβολής, χωρίς html_content/body_text. Αν το rendered_html λείπει
+        ή είναι παλιάς έκδοσης (αλλαγή sanitizer), γίνεται render τώρα και αποθηκεύεται.
+        Άρθρα του archive γίνονται render από το html_content σε κάθε προβολή (η σελίδα
+        μένει στο page cache), χωρίς εγγραφή: το archive μένει compact.
+        """
+        a = self.get_article(article_id, ARTICLE_FIELDS)
+        if a is None:
+            # όχι get_article(archive=True): το hot έχει ήδη ρωτηθεί
+            a = self.get_archived_article(article_id, (*ARTICLE_FIELDS, "html_content"))
+            if a:
+                a.update(render_fields({"html_content": a.pop("html_content", None)}))
+            return a
+        if a.get("render_version") != RENDER_VERSION:
+            raw = self.articles.find_one({"_id": a["_id"]}, {"html_content": 1}) or {}
+            rendered = render_fields(raw)
+            self.articles.update_one({"_id": a["_id"]}, {"$set": rendered})
+            a.update(rendered)
+        return a
+
+    def rerender_articles(self, batch_size: int = 200, limit: int | None = None, stale_only: bool = True) -> int:
+        """
+        Ξανά render του html_content σε batches (bulk_write). stale_only: μόνο όσα έχουν
+        render_version διαφορετικό από το τρέχον. limit: το πολύ τόσα (για background δουλειά).
+        """
+        query = {"render_version": {"$ne": RENDER_VERSION}} if stale_only else {}
+        cursor = self.articles.find(query, {"html_content": 1}, batch_size=batch_size)
+        if limit:
+            cursor = cursor.limit(limit)
+        ops, done = [], 0
+        for doc in cursor:
+            ops.append(UpdateOne({"_id": doc["_id"]}, {"$set": render_fields(doc)}))
+            if len(ops) >= batch_size:
+                self.articles.bulk_write(ops, ordered=False)
+                done += len(ops)
+                ops = []
+        if ops:
+            self.articles.bulk_write(ops, ordered=False)
+            done += len(ops)
+        if done:
+            self._bump_content_version()  # οι cached σελίδες άρθρων έχουν το παλιό render
+        return done
+
+    def archive_articles(self, days: int = ARCHIVE_DAYS, batch_size: int = 500, limit: int | None = None) -> int:
+        """
+        Tiering: άρθρα με published_at παλαιότερο από `days` μέρες μετακινούνται από το hot
+        `articles` στο `articles_archive` (archive_doc), σε batches, τα παλαιότερα πρώτα.
+        Κάθε batch: upsert στο archive με το ίδιο _id και μετά delete από το hot, οπότε ένα
+        διακοπτόμενο run απλώς συνεχίζει. Facets/content version ενημερώνονται όπως στο delete.
+        Επιστρέφει πόσα μετακινήθηκαν.
+        """
+        # σύγκριση σε επίπεδο ημέρας: τα published_at είναι ISO strings με διάφορα timezones
+        cutoff = (datetime.utcnow() - timedelta(days=days)).strftime("%Y-%m-%d")
+        query = {"published_at": {"$lt": cutoff}}
+        moved = 0
+        while limit is None or moved < limit:
+            n = batch_size if limit is None else min(batch_size, limit - moved)
+            docs = list(self.articles.find(query).sort([("published_at", 1), ("_id", 1)]).limit(n))
+            if not docs:
+                break
+            ops = [ReplaceOne({"_id": d["_id"]}, archive_doc(d), upsert=True) for d in docs]
+            try:
+                self.archive.bulk_write(ops, ordered=False)
+            except BulkWriteError as e:
+                # ίδιο url ήδη στο archive με άλλο _id: το hot αντίγραφο είναι duplicate
+                errors = e.details.get("writeErrors", [])
+                if any(err.get("code") != DUPLICATE_KEY for err in errors):
+                    raise
+                logger.warning("Archive: %s article(s) already archived under another id", len(errors))
+            self.articles.delete_many({"_id": {"$in": [d["_id"] for d in docs]}})
+            self._articles_changed(removed=docs)
+            moved += len(docs)
+            logger.info("Archived %s articles (published before %s)", moved, cutoff)
+        return moved
+
     def get_by_url(self, url):
         return self.articles.find_one({"url": url})
 
-    def list_articles(self, limit=20, query=None):
-        return list(self.articles.find(query or {}).sort("published_at", -1).limit(limit))
+    def existing_urls(self, urls) -> set[str]:
+        """
+        Ποια από τα urls υπάρχουν ήδη: ένα $in query (μόνο το url field) αντί για find_one ανά link.
+        Η σύγκριση γίνεται σε requote_uri μορφή: το link του listing (/άρθρο/) ταιριάζει με το
+        canonical που αποθηκεύτηκε percent-encoded (/%CE%AC.../) και αντίστροφα.
+        Επιστρέφει τα urls όπως δόθηκαν.
+        """
+        by_key = {}
+        for url in set(urls):
+            by_key.setdefault(requote_uri(url), []).append(url)
+        if not by_key:
+            return set()
+        candidates = list({*by_key, *(u for group in by_key.values() for u in group)})
+
+        def lookup(collection, keys):
+            return {requote_uri(d["url"]) for d in collection.find({"url": {"$in": keys}}, {"url": 1, "_id": 0})}
+
+        found = lookup(self.articles, candidates) & by_key.keys()
+        rest = [u for u in candidates if requote_uri(u) not in found]
+        if rest:
+            # π.χ. παλιό άρθρο που ξαναεμφανίζεται σε listing: να μη μπει ξανά στο hot
+            found |= lookup(self.archive, rest) & by_key.keys()
+        return {url for key in found for url in by_key[key]}
+
+    def get_crawl_state(self, source: str) -> dict:
+        return self.crawl_state.find_one({"_id": source}) or {"_id": source, "listings": {}}
+
+    def last_run_metrics(self) -> dict:
+        """
+        {source: metrics summary} του τελευταίου crawl κάθε πηγής (για το /metrics του web).
+        """
+        return {
+            doc["_id"]: doc["last_run"]["metrics"]
+            for doc in self.crawl_state.find({"last_run": {"$exists": True}}, {"last_run.metrics": 1})
+        }
+
+    def save_crawl_state(self, source: str, state: dict):
+        state = {k: v for k, v in state.items() if k != "_id"}
+        state["updated_at"] = datetime.utcnow().isoformat()
+        self.crawl_state.update_one({"_id": source}, {"$set": state}, upsert=True)
+
+    def get_schedule(self) -> dict:
+        """
+        {source: state} του scheduler, για να το συνεχίσει μετά από restart και για το admin.
+        """
+        return {doc["_id"]: doc for doc in self.schedule.find()}
+
+    def save_schedule(self, source: str, state: dict):
+        state = {k: v for k, v in state.items() if k != "_id"}
+        state["updated_at"] = datetime.utcnow().isoformat()
+        self.schedule.update_one({"_id": source}, {"$set": state}, upsert=True)
+
+    def list_articles(self, limit=20, query=None, text=None, before=None, after=None, fields=None):
+        """
+        text: full-text αναζήτηση (text index), ταξινόμηση κατά relevance και μετά ημερομηνία.
+        before/after: keyset cursors (encode_cursor) για την επόμενη/προηγούμενη σελίδα.
+        Χωρίς skip(): κάθε σελίδα κοστίζει όσο η πρώτη. Η σειρά είναι πάντα (published_at, _id) desc.
+        fields: projection (π.χ. CARD_FIELDS), ώστε οι λίστες να μη φέρνουν html_content.
+        Query με ρητό εύρος published_at (searches_archive): hot + archive, merge με την ίδια σειρά.
+        Με text, μετά τα αποτελέσματα του hot ακολουθούν όσα του archive ταιριάζουν (search_archive).
+        """
+        projection = _projection(fields)
+        archive = searches_archive(query)
+        if archive and projection:
+            projection = {**projection, "published_at": 1}  # χρειάζεται για το merge
+
+        if text:
+            hot_query = {**(query or {}), "$text": {"$search": normalize(text)}}
+            score = {"$meta": "textScore"}
+            cursor = self.articles.find(hot_query, {**(projection or {}), "score": score})
+            found = list(cursor.sort([("score", score), ("published_at", -1)]).limit(limit))
+            if archive and len(found) < limit:
+                # μετά τα αποτελέσματα του hot (relevance), όσα του archive ταιριάζουν, νεότερα πρώτα
+                found += self.search_archive(query, text, projection, limit - len(found))
+            return found
+
+        query = query or {}
+        newest_first = [("published_at", -1), ("_id", -1)]
+        if after and decode_cursor(after):
+            query = {"$and": [query, _keyset_filter(decode_cursor(after), older=False)]}
+            oldest_first = [("published_at", 1), ("_id", 1)]
+            return self._find_sorted(query, projection, oldest_first, limit, archive)[::-1]
+        if before and decode_cursor(before):
+            query = {"$and": [query, _keyset_filter(decode_cursor(before), older=True)]}
+        return self._find_sorted(query, projection, newest_first, limit, archive)
+
+    def search_archive(self, query, text: str, projection=None, limit: int = 20) -> list:
+        """
+        q στο archive, μέσα στο εύρος ημερομηνιών του query (archive_text_filter). Νεότερα πρώτα.
+        """
+        if not normalize(text):
+            return []
+        cursor = self.archive.find({"$and": [query, archive_text_filter(text)]}, self._archive_projection(projection))
+        return [restore_archived(d) for d in cursor.sort([("published_at", -1), ("_id", -1)]).limit(limit)]
+
+    def backfill_archive_search(self, batch_size: int = 500) -> int:
+        """
+        search.title/search.summary σε άρθρα του archive που μπήκαν πριν τα κρατά το archive_doc.
+        """
+        ops, done = [], 0
+        for doc in self.archive.find({"search": {"$exists": False}}, {"title": 1, "summary": 1}, batch_size=batch_size):
+            ops.append(UpdateOne({"_id": doc["_id"]}, {"$set": {"search": archive_search(doc)}}))
+            if len(ops) >= batch_size:
+                self.archive.bulk_write(ops, ordered=False)
+                done += len(ops)
+                ops = []
+        if ops:
+            self.archive.bulk_write(ops, ordered=False)
+            done += len(ops)
+        return done
+
+    def _find_sorted(self, query, projection, sort, limit: int, archive: bool = False) -> list:
+        cursors = [self.articles.find(query, projection).sort(sort).limit(limit)]
+        if not archive:
+            return list(cursors[0])
+        cursors.append(map(restore_archived, self.archive.find(query, self._archive_projection(projection))
+                           .sort(sort).limit(limit)))
+        return list(islice(_merge_sorted(cursors, newest_first=sort[0][1] < 0), limit))
+
+    def iter_articles(self, query=None, fields=None, batch_size: int = 500):
+        """
+        Όλα τα άρθρα του query, newest first, ως generator πάνω σε Mongo cursor:
+        ο driver φέρνει batch_size documents τη φορά, η μνήμη δεν εξαρτάται από το πλήθος.
+        Με ρητό εύρος published_at: hot + archive σε streaming merge.
+        """
+        sort = [("published_at", -1), ("_id", -1)]
+        projection = _projection(fields)
+        archive = searches_archive(query)
+        if archive and projection:
+            projection = {**projection, "published_at": 1}  # χρειάζεται για το merge
+        cursors = [self.articles.find(query or {}, projection, batch_size=batch_size).sort(sort)]
+        if archive:
+            cursors.append(self.archive.find(query, self._archive_projection(projection),
+                                             batch_size=batch_size).sort(sort))
+        try:
+            if archive:
+                yield from _merge_sorted([cursors[0], map(restore_archived, cursors[1])])
+            else:
+                yield from cursors[0]
+        finally:
+            for cursor in cursors:
+                cursor.close()
+
+    def page_articles(self, limit=20, query=None, before=None, after=None, fields=None, collapse=False):
+        """
+        Μία σελίδα + cursors: (articles, next_cursor προς παλαιότερα, prev_cursor προς νεότερα).
+        Φέρνει limit+1 για να ξέρει αν υπάρχει κι άλλη σελίδα.
+        collapse: ένα άρθρο ανά story_id (near-duplicates), με over-fetch x2 (ως x COLLAPSE_MAX_FETCH)
+        για να γεμίσει η σελίδα.
+        """
+        if fields and "published_at" not in fields:
+            fields = (*fields, "published_at")  # χρειάζεται για τα cursors
+        fetch = limit * 2 if collapse else limit
+        newer = bool(after and decode_cursor(after))
+        while True:
+            items = self.list_articles(limit=fetch + 1, query=query, before=before, after=after, fields=fields)
+            more = len(items) > fetch
+            if newer:
+                # προς τα νεότερα: τα πιο κοντινά στο cursor είναι στο τέλος της λίστας
+                candidates = (items[1:] if more else items)[::-1]
+            else:
+                candidates = items[:fetch]
+            size = collapse_stories(candidates, limit)[1] if collapse else min(limit, len(candidates))
+            # το όριο της σελίδας πρέπει να φαίνεται (το επόμενο story), αλλιώς μεγαλύτερο fetch
+            if not (collapse and more and size == len(candidates)) or fetch >= limit * COLLAPSE_MAX_FETCH:
+                break
+            fetch *= 2
+
+        if newer:
+            window = candidates[:size][::-1]
+            has_newer = more or size < len(candidates)
+            has_older = True
+        else:
+            window = candidates[:size]
+            has_older = more or size < len(candidates)
+            has_newer = bool(before and decode_cursor(before))
+
+        # collapse πάντα newest-first: αντιπρόσωπος κάθε story είναι το νεότερο άρθρο της σελίδας,
+        # όποια κατεύθυνση κι αν ήρθε ο χρήστης. Τα cursors είναι τα άκρα του window, οπότε
+        # Παλαιότερα -> Νεότερα δίνει τις ίδιες σελίδες όσο τα άρθρα ενός story είναι διαδοχικά
+        # (το συνηθισμένο: near-duplicates δημοσιεύονται μαζί). Stories που μπλέκονται χρονικά
+        # μπορεί να μοιραστούν αλλιώς στα όρια των σελίδων.
+        items = collapse_stories(window, limit)[0] if collapse else window
+        next_cursor = encode_cursor(window[-1]) if window and has_older else None
+        prev_cursor = encode_cursor(window[0]) if window and has_newer else None
+        return items, next_cursor, prev_cursor
 
-    def distinct_sources(self):
-        return sorted([v for v in self.articles.distinct("source") if v])
+    def distinct_sources(self, query=None):
+        """
+        distinct φέρνει μόνο το ένα πεδίο (χωρίς documents). query: προαιρετικό φίλτρο.
+        """
+        return sorted([v for v in self.articles.distinct("source", query or {}) if v])
 
-    def distinct_categories(self):
-        return sorted([v for v in self.articles.distinct("category") if v])
+    def distinct_categories(self, query=None):
+        return sorted([v for v in self.articles.distinct("category", query or {}) if v])
@@ -0,0 +1,111 @@
+import os
+import gzip
+import hashlib
+import logging
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+
+try:
+    import zstandard
+except ImportError:  # optional: χωρίς zstandard γράφουμε gzip
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DIR = "data/raw"
+
+
+class RawStore:
+    """
+    Content-addressed αποθήκη raw HTML στο δίσκο.
+    objects/ab/<sha256>.html.zst|.gz (συμπιεσμένο) + index.sqlite: url -> sha256 (τελευταίο fetch).
+    Ίδιο περιεχόμενο = ένα αρχείο, όσα URLs κι αν το σερβίρουν.
+    """
+
+    def __init__(self, root: str = DEFAULT_DIR):
+        self.root = Path(root)
+        (self.root / "objects").mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(self.root / "index.sqlite", timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            " url TEXT PRIMARY KEY, sha256 TEXT NOT NULL, source TEXT, kind TEXT, fetched_at TEXT)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS pages_source ON pages (source, kind)")
+        self.conn.commit()
+
+    def _path(self, sha: str, ext: str) -> Path:
+        return self.root / "objects" / sha[:2] / f"{sha}.html{ext}"
+
+    def put(self, url: str, content: bytes, source: str | None = None, kind: str = "article") -> str:
+        sha = hashlib.sha256(content).hexdigest()
+        if not self._find(sha):
+            ext = ".zst" if zstandard else ".gz"
+            data = zstandard.ZstdCompressor(level=10).compress(content) if zstandard else gzip.compress(content)
+            path = self._path(sha, ext)
+            path.parent.mkdir(exist_ok=True)
+            tmp = path.with_suffix(path.suffix + ".tmp")
+            tmp.write_bytes(data)
+            tmp.replace(path)  # atomic: ποτέ μισογραμμένο object
+
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO pages (url, sha256, source, kind, fetched_at) VALUES (?, ?, ?, ?, ?)",
+                (url, sha, source, kind, datetime.utcnow().isoformat()),
+            )
+        return sha
+
+    def _find(self, sha: str) -> Path | None:
+        for ext in (".zst", ".gz"):
+            path = self._path(sha, ext)
+            if path.exists():
+                return path
+        return None
+
+    def get(self, sha: str) -> bytes | None:
+        path = self._find(sha)
+        if not path:
+            return None
+        data = path.read_bytes()
+        if path.suffix == ".zst":
+            if not zstandard:
+                raise RuntimeError("zstandard is required to read .zst objects")
+            return zstandard.ZstdDecompressor().decompress(data)
+        return gzip.decompress(data)
+
+    def get_url(self, url: str) -> bytes | None:
+        row = self.conn.execute("SELECT sha256 FROM pages WHERE url = ?", (url,)).fetchone()
+        return self.get(row[0]) if row else None
+
+    def iter_pages(self, source: str | None = None, kind: str = "article"):
+        """
+        Streaming (url, source, html bytes): ένα object στη μνήμη κάθε φορά.
+        """
+        sql, params = "SELECT url, source, sha256 FROM pages WHERE kind = ?", [kind]
+        if source:
+            sql += " AND source = ?"
+            params.append(source)
+        for url, src, sha in self.conn.execute(sql + " ORDER BY url", params):
+            html = self.get(sha)
+            if html is None:
+                logger.warning("Missing object %s for %s", sha, url)
+                continue
+            yield url, src, html
+
+    def close(self):
+        self.conn.close()
+
+
+def open_default_store() -> RawStore | None:
+    """
+    RAW_STORE_DIR (default data/raw). Κενό RAW_STORE_DIR απενεργοποιεί την αποθήκευση.
+    """
+    root = os.getenv("RAW_STORE_DIR", DEFAULT_DIR)
+    if not root:
+        return None
+    try:
+        return RawStore(root)
+    except Exception:
+        logger.exception("Raw store unavailable (%s), crawling without it", root)
+        return None
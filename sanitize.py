@@ -0,0 +1,137 @@
+import re
+from urllib.parse import urlsplit
+
+from bs4 import NavigableString
+from bs4.element import PreformattedString
+
+from htmlparse import make_soup
+
+# αλλάζει σε κάθε αλλαγή του sanitizer (ή του parser που γράφει το html_content):
+# τα άρθρα με παλιό render_version ξαναγίνονται render (lazy στο view ή manage.py rerender)
+RENDER_VERSION = 2
+
+# tags που κρατάμε (με τα attributes τους από το ALLOWED_ATTRS)
+ALLOWED_TAGS = {
+    "p", "br", "hr", "h2", "h3", "h4", "h5", "h6",
+    "strong", "b", "em", "i", "u", "s", "sub", "sup", "small",
+    "ul", "ol", "li", "blockquote", "q", "cite", "code", "pre",
+    "a", "img", "figure", "figcaption",
+    "table", "thead", "tbody", "tfoot", "tr", "th", "td", "caption",
+}
+# tags που πετάμε μαζί με το περιεχόμενό τους
+DROP_TAGS = {
+    "script", "style", "noscript", "iframe", "object", "embed", "form", "input", "button",
+    "select", "textarea", "svg", "canvas", "video", "audio", "nav", "aside", "footer", "header",
+    "template", "link", "meta",
+    # raw-text elements: το περιεχόμενό τους είναι κείμενο που μοιάζει με markup
+    "xmp", "title", "noembed", "noframes", "plaintext", "head",
+}
+# ό,τι άλλο (div, span, section, font, h1...) γίνεται unwrap: μένει το περιεχόμενο, φεύγει το tag
+ALLOWED_ATTRS = {
+    "a": {"href", "title"},
+    "img": {"src", "alt", "width", "height"},
+    "td": {"colspan", "rowspan"},
+    "th": {"colspan", "rowspan"},
+}
+# lazy-loaded εικόνες των sites: το πραγματικό src είναι σε data-* attribute
+LAZY_SRC_ATTRS = ("data-src", "data-lazy-src", "data-original")
+
+_SAFE_SCHEMES = {"", "http", "https"}
+_INT = re.compile(r"^\d{1,5}$")
+_WS = re.compile(r"\s+")
+
+
+def _safe_url(url: str | None) -> str | None:
+    url = (url or "").strip()
+    if not url:
+        return None
+    try:
+        scheme = urlsplit(url).scheme.lower()
+    except ValueError:
+        return None
+    return url if scheme in _SAFE_SCHEMES else None
+
+
+def _clean_img(img) -> bool:
+    """
+    src (και από lazy attributes), size hints, lazy loading. False = να φύγει η εικόνα.
+    """
+    src = img.get("src")
+    if not src or src.startswith("data:"):
+        src = next((img.get(a) for a in LAZY_SRC_ATTRS if img.get(a)), src)
+    src = _safe_url(src)
+    if not src or src.startswith("data:"):
+        return False
+
+    width, height = str(img.get("width", "")), str(img.get("height", ""))
+    # tracking pixels
+    if width in ("0", "1") or height in ("0", "1"):
+        return False
+
+    img.attrs = {"src": src, "alt": img.get("alt", ""), "loading": "lazy", "decoding": "async"}
+    if _INT.match(width) and _INT.match(height):
+        img["width"], img["height"] = width, height
+    return True
+
+
+def sanitize_html(html: str | None) -> str:
+    """
+    Allowlist sanitizer για το σώμα άρθρου. Επιστρέφει compact fragment:
+    χωρίς scripts/styles/inline style/class/data-*/on* attributes, links nofollow,
+    εικόνες με loading=lazy και width/height όπου υπάρχουν.
+    """
+    if not html:
+        return ""
+    soup = make_soup(html)
+    root = soup.body or soup
+
+    # comments, CDATA, doctype, processing instructions: τυπώνονται αυτούσια, δεν τα κρατάμε
+    for special in root.find_all(string=lambda s: isinstance(s, PreformattedString)):
+        special.extract()
+
+    # list(): το δέντρο αλλάζει όσο το διατρέχουμε
+    for tag in list(root.find_all(True)):
+        if tag.decomposed:
+            continue
+        name = tag.name
+        if name in DROP_TAGS:
+            tag.decompose()
+        elif name not in ALLOWED_TAGS:
+            tag.unwrap()
+        elif name == "img":
+            if not _clean_img(tag):
+                tag.decompose()
+        else:
+            allowed = ALLOWED_ATTRS.get(name, ())
+            tag.attrs = {k: v for k, v in tag.attrs.items() if k in allowed}
+            if name == "a":
+                href = _safe_url(tag.get("href"))
+                if href:
+                    tag.attrs.update(href=href, rel="nofollow noopener", target="_blank")
+                else:
+                    tag.attrs.pop("href", None)
+
+    # άδειες παράγραφοι/links που έμειναν από τα αφαιρεμένα blocks
+    for tag in root.find_all(["p", "a", "li", "figure"]):
+        if not tag.get_text(strip=True) and not tag.find("img"):
+            tag.decompose()
+
+    # compact: ενιαία κενά στο κείμενο (εκτός <pre>). Κάθε string γίνεται απλό NavigableString,
+    # ώστε να γίνει escape στο serialize (π.χ. Script/Stylesheet χωρίς το tag τους)
+    for text in list(root.find_all(string=True)):
+        compact = str(text) if text.find_parent("pre") else _WS.sub(" ", text)
+        if type(text) is not NavigableString or compact != text:
+            text.replace_with(NavigableString(compact))
+
+    # decode_contents: escape του κειμένου (&lt; &gt; &amp;), όχι str() ανά node
+    return root.decode_contents().strip()
+
+
+def render_fields(article: dict) -> dict:
+    """
+    rendered_html + render_version για αποθήκευση στο άρθρο (ingest, lazy re-render, rerender).
+    """
+    return {
+        "rendered_html": sanitize_html(article.get("html_content")),
+        "render_version": RENDER_VERSION,
+    }
@@ -0,0 +1,216 @@
+import argparse
+import logging
+import random
+import signal
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime, timedelta
+
+import httpclient
+from crawler import DEFAULT_CONCURRENCY, DEFAULT_PARSE_WORKERS
+from jobs import JobQueue
+from mongo import MongoDB
+from scraperall import SOURCES, _run_source
+
+logger = logging.getLogger("scheduler")
+logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+DEFAULT_INTERVAL = 600   # sec: πρώτο interval μιας πηγής χωρίς ιστορικό
+MIN_INTERVAL = 120
+MAX_INTERVAL = 3600
+TARGET_PER_RUN = 5       # στόχος: ~τόσα νέα άρθρα ανά crawl (interval = στόχος / publish rate)
+RATE_SMOOTHING = 0.3     # EWMA βάρος της τελευταίας μέτρησης του publish rate
+BACKOFF = 1.5            # καμία αλλαγή στη σελίδα: interval *= BACKOFF
+ERROR_BACKOFF = 2.0      # σφάλμα ή throttling
+JITTER = 0.1             # ±10%, για να μη συγχρονίζονται οι πηγές
+
+IDLE, RUNNING = "idle", "running"
+
+
+def _now() -> datetime:
+    return datetime.utcnow()
+
+
+def _parse_time(value) -> datetime | None:
+    try:
+        return datetime.fromisoformat(value) if value else None
+    except ValueError:
+        return None
+
+
+def adapt(state: dict, stats: dict, finished: datetime,
+          min_interval: float = MIN_INTERVAL, max_interval: float = MAX_INTERVAL) -> dict:
+    """
+    Νέο interval/rate μιας πηγής από το αποτέλεσμα ενός crawl.
+    - νέα άρθρα: interval ώστε να βρίσκουμε ~TARGET_PER_RUN ανά crawl (EWMA του publish rate)
+    - καμία αλλαγή (304 / μόνο γνωστά άρθρα): σταδιακό back off
+    - error / 429: ERROR_BACKOFF, και η επόμενη εκτέλεση όχι πριν το Retry-After
+    """
+    interval = float(state.get("interval") or DEFAULT_INTERVAL)
+    rate = state.get("rate")  # άρθρα / sec
+    added = stats.get("added") or 0
+
+    previous = _parse_time(state.get("last_run_at"))
+    window = (finished - previous).total_seconds() if previous else None
+    if window and window > 0:
+        sample = added / window
+        rate = sample if rate is None else (1 - RATE_SMOOTHING) * rate + RATE_SMOOTHING * sample
+
+    retry_after = stats.get("retry_after") or 0
+    if stats.get("error") or stats.get("throttled"):
+        interval *= ERROR_BACKOFF
+    elif added and rate:
+        interval = TARGET_PER_RUN / rate
+    elif not added:
+        interval *= BACKOFF
+    interval = min(max_interval, max(min_interval, interval))
+
+    delay = max(interval * random.uniform(1 - JITTER, 1 + JITTER), retry_after)
+    return {
+        "interval": round(interval, 1),
+        "rate": rate,
+        "next_run_at": (finished + timedelta(seconds=delay)).isoformat(),
+    }
+
+
+class Scheduler:
+    """
+    Daemon που τρέχει κάθε πηγή του SOURCES στο δικό της, adaptive, interval.
+    Η κατάσταση ανά πηγή (interval, last/next run, τελευταία stats) ζει στη Mongo
+    (collection `schedule`): συνεχίζει μετά από restart και τη δείχνει το admin.
+    Ένα session και ένα MongoDB για όλη τη ζωή του daemon: οι keep-alive connections
+    ξαναχρησιμοποιούνται από run σε run (όσο δεν τις κλείσει ο server).
+    Μια πηγή που την κάνει ήδη crawl ένα queued/running job (/scrape) αναβάλλεται.
+    """
+
+    def __init__(self, db: MongoDB, sources=None, min_interval: float = MIN_INTERVAL,
+                 max_interval: float = MAX_INTERVAL, **crawl_kwargs):
+        self.db = db
+        self.sources = [name for name in SOURCES if not sources or name in sources]
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.jobs = JobQueue(db)
+        self.crawl_kwargs = crawl_kwargs
+        self.crawl_kwargs.setdefault("db", db)
+        self.crawl_kwargs.setdefault("session", httpclient.make_session(
+            pool_size=crawl_kwargs.get("concurrency", DEFAULT_CONCURRENCY), hosts=len(self.sources)))
+        self.stop = threading.Event()
+        self.state = db.get_schedule()
+        for name in self.sources:
+            # RUNNING από προηγούμενο process που σκοτώθηκε: ξανατρέχει αμέσως
+            st = self.state.setdefault(name, {})
+            if st.get("status") == RUNNING or not st.get("next_run_at"):
+                st.update(status=IDLE, next_run_at=_now().isoformat())
+            st.setdefault("interval", DEFAULT_INTERVAL)
+
+    def _save(self, name: str, **changes):
+        self.state[name].update(changes)
+        self.db.save_schedule(name, self.state[name])
+
+    def _due(self, running) -> list[str]:
+        now = _now()
+        return [
+            name for name in self.sources
+            if name not in running and _parse_time(self.state[name]["next_run_at"]) <= now
+        ]
+
+    def _seconds_to_next(self, running) -> float:
+        idle = [_parse_time(self.state[n]["next_run_at"]) for n in self.sources if n not in running]
+        if not idle:
+            return 60.0
+        return max(0.0, (min(idle) - _now()).total_seconds())
+
+    def _claimed_by_job(self, name: str) -> bool:
+        """
+        True αν ενεργό job (queued/running) θα κάνει ή κάνει ήδη crawl την πηγή:
+        το run αναβάλλεται κατά min_interval αντί να τρέξουν δύο crawls μαζί.
+        """
+        try:
+            busy = self.jobs.is_active(name)
+        except Exception:
+            logger.exception("Job queue check failed")
+            return False
+        if busy:
+            next_run = _now() + timedelta(seconds=self.min_interval)
+            self._save(name, next_run_at=next_run.isoformat())
+            logger.info(f"{name}: crawl από job σε εξέλιξη, επόμενο στις {next_run.isoformat()}")
+        return busy
+
+    def _finished(self, name: str, stats: dict):
+        finished = _now()
+        changes = adapt(self.state[name], stats, finished, self.min_interval, self.max_interval)
+        self._save(name, status=IDLE, last_run_at=finished.isoformat(), last_stats=stats,
+                   last_error=stats.get("error"), **changes)
+        logger.info(f"{name}: +{stats.get('added', 0)} άρθρα, επόμενο σε {changes['interval']:.0f}s "
+                    f"({changes['next_run_at']})")
+
+    def run(self, once: bool = False):
+        """
+        once: κάθε πηγή μία φορά (π.χ. από cron) και τερματισμός.
+        Στο stop (SIGTERM/SIGINT) δεν ξεκινά νέα crawls, περιμένει όσα τρέχουν να τελειώσουν.
+        """
+        running = {}  # future -> source
+        pending = list(self.sources) if once else None
+        logger.info(f"Scheduler ready: {', '.join(self.sources)}")
+        with ThreadPoolExecutor(max_workers=max(1, len(self.sources)), thread_name_prefix="source") as pool:
+            while True:
+                if not self.stop.is_set():
+                    due = pending if once else self._due(running.values())
+                    for name in due:
+                        if self._claimed_by_job(name):
+                            continue
+                        self._save(name, status=RUNNING, started_at=_now().isoformat())
+                        running[pool.submit(_run_source, name, SOURCES[name], **self.crawl_kwargs)] = name
+                    if once:
+                        pending = []
+
+                if not running:
+                    if once or self.stop.is_set():
+                        break
+                    self.stop.wait(self._seconds_to_next(running.values()))
+                    continue
+
+                # ξυπνάμε όταν τελειώσει ένα crawl ή όταν γίνει due η επόμενη πηγή
+                timeout = None if self.stop.is_set() else min(self._seconds_to_next(running.values()), 5.0)
+                done, _ = wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    self._finished(running.pop(fut), fut.result())
+        self.crawl_kwargs["session"].close()
+        logger.info("Scheduler stopped")
+
+
+def main(sources=None, pages: int = 3, min_interval: float = MIN_INTERVAL, max_interval: float = MAX_INTERVAL,
+         concurrency: int = DEFAULT_CONCURRENCY, rate=None, parse_workers: int = DEFAULT_PARSE_WORKERS,
+         once: bool = False):
+    scheduler = Scheduler(
+        MongoDB(), sources=sources, min_interval=min_interval, max_interval=max_interval,
+        pages=pages, concurrency=concurrency, rate=rate, parse_workers=parse_workers,
+    )
+
+    def shutdown(*_):
+        if not scheduler.stop.is_set():
+            logger.info("Stopping: waiting for running crawls to finish...")
+        scheduler.stop.set()
+
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(sig, shutdown)
+    scheduler.run(once=once)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sources", nargs="+", choices=list(SOURCES), help="Πηγές (default: όλες)")
+    parser.add_argument("--pages", type=int, default=3,
+                        help="Μέγιστες listing σελίδες ανά crawl (το incremental σταματά νωρίτερα)")
+    parser.add_argument("--min-interval", type=float, default=MIN_INTERVAL, help="Ελάχιστο interval (sec)")
+    parser.add_argument("--max-interval", type=float, default=MAX_INTERVAL, help="Μέγιστο interval (sec)")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="Αιτήματα σε πτήση ανά host")
+    parser.add_argument("--rate", type=float, default=None, help="Αιτήματα/sec ανά host (default: 1/delay)")
+    parser.add_argument("--parse-workers", type=int, default=DEFAULT_PARSE_WORKERS,
+                        help="Processes για parse ανά πηγή (0 = στο ίδιο process)")
+    parser.add_argument("--once", action="store_true", help="Κάθε πηγή μία φορά και τερματισμός")
+    args = parser.parse_args()
+
+    main(sources=args.sources, pages=args.pages, min_interval=args.min_interval,
+         max_interval=args.max_interval, concurrency=args.concurrency, rate=args.rate,
+         parse_workers=args.parse_workers, once=args.once)
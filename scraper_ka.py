@@ -1,48 +1,35 @@
 import argparse
-import time
 import logging
 from urllib.parse import urljoin, urldefrag
 import requests
-from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
 from bs4 import BeautifulSoup
 from dateutil import parser as dateparser
 
+import httpclient
 from mongo import MongoDB
+from htmlparse import make_soup, collect_meta, node_text
+from crawler import crawl_site, DEFAULT_CONCURRENCY, DEFAULT_PARSE_WORKERS
 
 BASE = "https://www.kathimerini.gr"
 LISTING = BASE + "/epikairothta/"
 
-HEADERS = {"User-Agent": "NewsAggregatorBot/1.0 (+project)"}
+HEADERS = {"User-Agent": httpclient.USER_AGENT}
 logger = logging.getLogger("kathimerini")
 logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
 
 
-def make_session() -> requests.Session:
+def make_session(pool_size: int = DEFAULT_CONCURRENCY) -> requests.Session:
     """
-    Session με retries για transient errors (429/5xx).
+    Session με retries για transient errors (429/5xx): το κοινό httpclient session.
     """
-    session = requests.Session()
-    retry = Retry(
-        total=3,
-        connect=3,
-        read=3,
-        backoff_factor=0.5,
-        status_forcelist=(429, 500, 502, 503, 504),
-        allowed_methods=("GET",),
-        raise_on_status=False,
-    )
-    adapter = HTTPAdapter(max_retries=retry)
-    session.mount("http://", adapter)
-    session.mount("https://", adapter)
-    return session
+    return httpclient.make_session(pool_size)
 
 
 def get_soup(url: str, session: requests.Session):
     try:
-        r = session.get(url, headers=HEADERS, timeout=15)
+        r = httpclient.get(session, url, headers=HEADERS, timeout=15)
         r.raise_for_status()
-        return BeautifulSoup(r.text, "html.parser")
+        return make_soup(r.text)
     except Exception as e:
         logger.warning(f"Failed to fetch {url}: {e}")
         return None
@@ -76,31 +63,38 @@ def canonicalize_url(soup: BeautifulSoup, fallback_url: str) -> str:
     return fallback_url
 
 
+def listing_url(page: int) -> str:
+    return LISTING + f"?page={page}"
+
+
 def parse_article(url: str, session: requests.Session):
     soup = get_soup(url, session)
     if not soup:
         return None
+    return parse_soup(url, soup)
+
+
+def parse_html(url: str, html, parser: str | None = None):
+    return parse_soup(url, make_soup(html, parser))
 
+
+def parse_soup(url: str, soup: BeautifulSoup):
     # canonical url (βοηθά dedup)
     url = canonicalize_url(soup, url)
 
-    title = soup.find("meta", property="og:title")
-    title = title["content"].strip() if title and title.get("content") else None
+    # όλα τα og:*/article:*/description σε ένα πέρασμα
+    meta = collect_meta(soup)
+
+    title = meta.get("og:title")
     if not title and soup.find("h1"):
         title = soup.find("h1").get_text(strip=True)
 
-    pub = soup.find("meta", property="article:published_time")
-    pub = pub["content"].strip() if pub and pub.get("content") else None
+    pub = meta.get("article:published_time")
     published_at = dateparser.parse(pub).isoformat() if pub else None
 
-    cat = soup.find("meta", property="article:section")
-    category = cat["content"].strip() if cat and cat.get("content") else None
-
-    img = soup.find("meta", property="og:image")
-    image_url = img["content"].strip() if img and img.get("content") else None
-
-    desc = soup.find("meta", attrs={"name": "description"})
-    summary = desc["content"].strip() if desc and desc.get("content") else None
+    category = meta.get("article:section")
+    image_url = meta.get("og:image")
+    summary = meta.get("description")
 
     tags = []
     tag_block = soup.find("ul", class_="tags")
@@ -114,6 +108,7 @@ def parse_article(url: str, session: requests.Session):
 
     body = soup.find("div", class_="entry-content")
     html_content = str(body) if body else None
+    body_text = node_text(body) if body else ""
     if not html_content:
         logger.info(f"No body content found for: {url}")
 
@@ -127,51 +122,42 @@ def parse_article(url: str, session: requests.Session):
         "summary": summary,
         "tags": tags,
         "html_content": html_content,
+        "body_text": body_text,
     }
 
 
-def crawl(pages: int = 1, delay: float = 1.0):
-    session = make_session()
-    db = MongoDB()
-    added = 0
-
-    for page in range(1, pages + 1):
-        url = LISTING + f"?page={page}"
-        soup = get_soup(url, session)
-        if not soup:
-            continue
-
-        links = extract_links(soup)
-        logger.info(f"Listing page {page}: {len(links)} links found")
-
-        for link in links:
-            # ✅ link already defragged in extract_links, but safe to do again:
-            link, _ = urldefrag(link)
-
-            if db.get_by_url(link):
-                continue
-
-            article = parse_article(link, session)
-            if not article:
-                continue
-
-            # Αν canonical URL διαφορετικό, ξανα-τσέκαρε dedup
-            if article.get("url") and db.get_by_url(article["url"]):
-                continue
-
-            if article.get("url") and article.get("title"):
-                if db.insert_article(article):
-                    added += 1
-                    logger.info(f"Inserted: {article['title']}")
-            time.sleep(delay)
-
-    logger.info(f"Done. Added {added} new articles.")
+def crawl(pages: int = 1, delay: float = 1.0, concurrency: int = DEFAULT_CONCURRENCY, rate=None,
+          progress=None, incremental: bool = True, parse_workers: int = DEFAULT_PARSE_WORKERS,
+          session=None, db=None):
+    return crawl_site(
+        source="kathimerini",
+        session=session or make_session(concurrency),
+        db=db or MongoDB(),
+        listing_url=listing_url,
+        extract_links=extract_links,
+        parse_html=parse_html,
+        pages=pages,
+        delay=delay,
+        concurrency=concurrency,
+        rate=rate,
+        headers=HEADERS,
+        timeout=15,
+        progress=progress,
+        incremental=incremental,
+        parse_workers=parse_workers,
+    )
 
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("--pages", type=int, default=1)
     parser.add_argument("--delay", type=float, default=1.0)
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="Αιτήματα σε πτήση ανά host")
+    parser.add_argument("--rate", type=float, default=None, help="Αιτήματα/sec ανά host (default: 1/delay)")
+    parser.add_argument("--parse-workers", type=int, default=DEFAULT_PARSE_WORKERS,
+                        help="Processes για parse (0 = στο ίδιο process)")
+    parser.add_argument("--full", action="store_true", help="Χωρίς early stop / conditional GET")
     args = parser.parse_args()
 
-    crawl(pages=args.pages, delay=args.delay)
+    crawl(pages=args.pages, delay=args.delay, concurrency=args.concurrency, rate=args.rate,
+          incremental=not args.full, parse_workers=args.parse_workers)
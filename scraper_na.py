@@ -1,25 +1,26 @@
 import argparse
-import time
 import logging
 from urllib.parse import urljoin, urldefrag
-import requests
 from bs4 import BeautifulSoup
 from dateutil import parser as dateparser
+import httpclient
 from mongo import MongoDB
+from htmlparse import make_soup, collect_meta, node_text
+from crawler import crawl_site, DEFAULT_CONCURRENCY, DEFAULT_PARSE_WORKERS
 
 BASE = "https://www.naftemporiki.gr"
 LISTING = BASE + "/newsroom/"
 
-HEADERS = {"User-Agent": "NewsAggregatorBot/1.0 (+project)"}
+HEADERS = {"User-Agent": httpclient.USER_AGENT}
 logger = logging.getLogger("naftemporiki")
 logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
 
 
 def get_soup(url, session):
     try:
-        r = session.get(url, headers=HEADERS, timeout=20)
+        r = httpclient.get(session, url, headers=HEADERS, timeout=20)
         r.raise_for_status()
-        return BeautifulSoup(r.text, "html.parser")
+        return make_soup(r.text)
     except Exception as e:
         logger.warning(f"Failed to fetch {url}: {e}")
         return None
@@ -54,10 +55,11 @@ def extract_links(soup):
     return list(links)
 
 
-def extract_body_html(soup: BeautifulSoup) -> str | None:
+def extract_body(soup: BeautifulSoup):
     """
     Robust body extractor για Ναυτεμπορική: πολλά fallbacks.
     Στόχος: να μη μένει το html_content None.
+    Επιστρέφει (html, text): το κείμενο βγαίνει από το ίδιο node, χωρίς δεύτερο parse στο ingest.
     """
     selectors = [
         "div.article__main",
@@ -76,19 +78,22 @@ def extract_body_html(soup: BeautifulSoup) -> str | None:
             break
 
     if not node:
-        return None
+        return None, None
 
     # καθαρίζουμε “άχρηστα” blocks που συχνά υπάρχουν μέσα στο main/article
     for bad in node.select("nav, aside, footer, form, script, style"):
         bad.decompose()
 
-    html = str(node).strip()
     # αν το κείμενο είναι υπερβολικά μικρό, το θεωρούμε ότι δεν βρήκαμε σώμα
-    text_len = len(BeautifulSoup(html, "html.parser").get_text(" ", strip=True))
-    if text_len < 150:
-        return None
+    text = node_text(node)
+    if len(text) < 150:
+        return None, None
+
+    return str(node).strip(), text
+
 
-    return html
+def extract_body_html(soup: BeautifulSoup) -> str | None:
+    return extract_body(soup)[0]
 
 
 def extract_tags(soup: BeautifulSoup) -> list[str]:
@@ -113,31 +118,39 @@ def extract_tags(soup: BeautifulSoup) -> list[str]:
     return tags
 
 
+def listing_url(page: int) -> str:
+    # Σημείωση: Αν η newsroom δεν δουλεύει με ?page=, άλλαξέ το σε /page/{page}/
+    return LISTING + (f"?page={page}" if page > 1 else "")
+
+
 def parse_article(url, session):
     soup = get_soup(url, session)
     if not soup:
         return None
+    return parse_soup(url, soup)
+
+
+def parse_html(url: str, html, parser: str | None = None):
+    return parse_soup(url, make_soup(html, parser))
 
-    title = soup.find("meta", property="og:title")
-    title = title["content"].strip() if title and title.get("content") else None
+
+def parse_soup(url: str, soup: BeautifulSoup):
+    # όλα τα og:*/article:*/description σε ένα πέρασμα
+    meta = collect_meta(soup)
+
+    title = meta.get("og:title")
     if not title and soup.find("h1"):
         title = soup.find("h1").get_text(strip=True)
 
-    pub = soup.find("meta", property="article:published_time")
-    pub = pub["content"].strip() if pub and pub.get("content") else None
+    pub = meta.get("article:published_time")
     published_at = dateparser.parse(pub).isoformat() if pub else None
 
-    cat = soup.find("meta", property="article:section")
-    category = cat["content"].strip() if cat and cat.get("content") else None
-
-    img = soup.find("meta", property="og:image")
-    image_url = img["content"].strip() if img and img.get("content") else None
-
-    desc = soup.find("meta", attrs={"name": "description"})
-    summary = desc["content"].strip() if desc and desc.get("content") else None
+    category = meta.get("article:section")
+    image_url = meta.get("og:image")
+    summary = meta.get("description")
 
     tags = extract_tags(soup)
-    html_content = extract_body_html(soup)
+    html_content, body_text = extract_body(soup)
 
     # log για να ξέρεις αν συνεχίζει να χάνει body
     if html_content is None:
@@ -153,41 +166,40 @@ def parse_article(url, session):
         "summary": summary,
         "tags": tags,
         "html_content": html_content,
+        "body_text": body_text or "",
     }
 
 
-def crawl(pages=1, delay=1.0):
-    session = requests.Session()
-    db = MongoDB()
-    added = 0
-
-    for page in range(1, pages + 1):
-        # Σημείωση: Αν η newsroom δεν δουλεύει με ?page=, άλλαξέ το σε /page/{page}/
-        url = LISTING + (f"?page={page}" if page > 1 else "")
-        soup = get_soup(url, session)
-        if not soup:
-            continue
-
-        links = extract_links(soup)
-        logger.info(f"Listing page {page}: {len(links)} links found")
-
-        for link in links:
-            if db.get_by_url(link):
-                continue
-
-            article = parse_article(link, session)
-            if article and article.get("url") and article.get("title"):
-                if db.insert_article(article):
-                    added += 1
-                    logger.info(f"Inserted: {article['title']}")
-            time.sleep(delay)
-
-    logger.info(f"Done. Added {added} new articles.")
+def crawl(pages=1, delay=1.0, concurrency=DEFAULT_CONCURRENCY, rate=None, progress=None,
+          incremental=True, parse_workers=DEFAULT_PARSE_WORKERS, session=None, db=None):
+    return crawl_site(
+        source="naftemporiki",
+        session=session or httpclient.make_session(concurrency),
+        db=db or MongoDB(),
+        listing_url=listing_url,
+        extract_links=extract_links,
+        parse_html=parse_html,
+        pages=pages,
+        delay=delay,
+        concurrency=concurrency,
+        rate=rate,
+        headers=HEADERS,
+        timeout=20,
+        progress=progress,
+        incremental=incremental,
+        parse_workers=parse_workers,
+    )
 
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("--pages", type=int, default=1)
     parser.add_argument("--delay", type=float, default=1.0)
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="Αιτήματα σε πτήση ανά host")
+    parser.add_argument("--rate", type=float, default=None, help="Αιτήματα/sec ανά host (default: 1/delay)")
+    parser.add_argument("--parse-workers", type=int, default=DEFAULT_PARSE_WORKERS,
+                        help="Processes για parse (0 = στο ίδιο process)")
+    parser.add_argument("--full", action="store_true", help="Χωρίς early stop / conditional GET")
     args = parser.parse_args()
-    crawl(pages=args.pages, delay=args.delay)
+    crawl(pages=args.pages, delay=args.delay, concurrency=args.concurrency, rate=args.rate,
+          incremental=not args.full, parse_workers=args.parse_workers)
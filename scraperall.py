@@ -1,31 +1,106 @@
 import argparse
 import logging
 import time
+from concurrent.futures import ThreadPoolExecutor
 
+import httpclient
 import scraper_na as na
 import scraper_ka as ka
+from crawler import DEFAULT_CONCURRENCY, DEFAULT_PARSE_WORKERS
+from mongo import MongoDB
 
 logger = logging.getLogger("scrape_all")
 logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
 
+# Registry πηγών: νέα πηγή = νέα γραμμή εδώ (crawl με την υπογραφή του scraper_na.crawl, επιστρέφει stats)
+SOURCES = {
+    "naftemporiki": na.crawl,
+    "kathimerini": ka.crawl,
+}
 
-def scrape_all(pages=1, delay=1.0, sources=None):
-    if not sources or "naftemporiki" in sources:
-        logger.info("Ξεκινάει scraping Ναυτεμπορικής...")
-        na.crawl(pages=pages, delay=delay)
-        time.sleep(2)
+# parse_html(url, html) ανά πηγή: για offline reparse από το raw store (manage.py reparse)
+PARSERS = {
+    "naftemporiki": na.parse_html,
+    "kathimerini": ka.parse_html,
+}
 
-    if not sources or "kathimerini" in sources:
-        logger.info("Ξεκινάει scraping Καθημερινής...")
-        ka.crawl(pages=pages, delay=delay)
-        time.sleep(2)
+
+def _run_source(name, crawl, **kwargs):
+    """
+    Τρέχει μία πηγή. Ένα exception δεν ακυρώνει τις υπόλοιπες: γυρνάει ως stats με error.
+    """
+    started = time.monotonic()
+    logger.info(f"Ξεκινάει scraping: {name}")
+    try:
+        return crawl(**kwargs)
+    except Exception as e:
+        logger.exception(f"Scraping failed: {name}")
+        return {
+            "source": name,
+            "pages": 0,
+            "added": 0,
+            "duplicates": 0,
+            "failures": 1,
+            "elapsed": round(time.monotonic() - started, 2),
+            "error": str(e),
+        }
+
+
+def log_summary(results):
+    logger.info("%-14s %6s %6s %8s %8s", "source", "pages", "added", "failures", "elapsed")
+    for r in results:
+        logger.info("%-14s %6s %6s %8s %7.1fs%s", r["source"], r["pages"], r["added"],
+                    r["failures"], r["elapsed"], f"  ERROR: {r['error']}" if r.get("error") else "")
+
+
+def scrape_all(pages=1, delay=1.0, sources=None, concurrency=DEFAULT_CONCURRENCY, rate=None,
+               progress=None, incremental=True, parse_workers=DEFAULT_PARSE_WORKERS, db=None):
+    """
+    Οι πηγές τρέχουν παράλληλα (διαφορετικοί hosts, κάθε μία με δικό της rate limit).
+    Συνολικός χρόνος ≈ ο χρόνος της πιο αργής πηγής.
+    Το `progress(source, stats)` (αν δοθεί) λαμβάνει τα counters κάθε πηγής όσο τρέχει.
+    Όλες οι πηγές μοιράζονται ένα session (pool ανά host, concurrency connections το καθένα)
+    και ένα MongoDB: το `db` του caller (π.χ. του worker) ή ένα για όλο το run.
+    """
+    selected = [name for name in SOURCES if not sources or name in sources]
+    session = httpclient.make_session(pool_size=concurrency, hosts=len(selected))
+    own_db = db is None
+    if own_db:
+        db = MongoDB()
+    kwargs = dict(pages=pages, delay=delay, concurrency=concurrency, rate=rate,
+                  incremental=incremental, parse_workers=parse_workers, session=session, db=db)
+
+    def source_progress(name):
+        if not progress:
+            return None
+        return lambda stats: progress(name, stats)
+
+    with ThreadPoolExecutor(max_workers=max(1, len(selected)), thread_name_prefix="source") as pool:
+        futures = [
+            pool.submit(_run_source, name, SOURCES[name], progress=source_progress(name), **kwargs)
+            for name in selected
+        ]
+        results = [f.result() for f in futures]
+    session.close()
+    if own_db:
+        db.close()
+
+    log_summary(results)
+    return results
 
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("--pages", type=int, default=1, help="Πόσες σελίδες ανά site")
     parser.add_argument("--delay", type=float, default=1.0, help="Καθυστέρηση ανά αίτημα")
-    parser.add_argument("--sources", nargs="+", choices=["naftemporiki", "kathimerini"], help="Πηγές")
+    parser.add_argument("--sources", nargs="+", choices=list(SOURCES), help="Πηγές")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="Αιτήματα σε πτήση ανά host")
+    parser.add_argument("--rate", type=float, default=None, help="Αιτήματα/sec ανά host (default: 1/delay)")
+    parser.add_argument("--parse-workers", type=int, default=DEFAULT_PARSE_WORKERS,
+                        help="Processes για parse ανά πηγή (0 = στο ίδιο process)")
+    parser.add_argument("--full", action="store_true", help="Χωρίς early stop / conditional GET")
     args = parser.parse_args()
 
-    scrape_all(pages=args.pages, delay=args.delay, sources=args.sources)
+    scrape_all(pages=args.pages, delay=args.delay, sources=args.sources,
+               concurrency=args.concurrency, rate=args.rate, incremental=not args.full,
+               parse_workers=args.parse_workers)
@@ -0,0 +1,54 @@
+import re
+import hashlib
+
+from textnorm import normalize
+
+BITS = 64
+BANDS = 4               # 4 bands x 16 bits: απόσταση <= 3 => κοινό band (pigeonhole)
+MAX_DISTANCE = 3        # Hamming απόσταση για "ίδια είδηση"
+SHINGLE = 3             # λέξεις ανά shingle
+MIN_TOKENS = 20         # πολύ μικρά κείμενα δίνουν αναξιόπιστο fingerprint
+
+_TOKEN = re.compile(r"\w+")
+_BAND_BITS = BITS // BANDS
+_BAND_MASK = (1 << _BAND_BITS) - 1
+
+
+def _hash64(s: str) -> int:
+    return int.from_bytes(hashlib.blake2b(s.encode(), digest_size=8).digest(), "big")
+
+
+def simhash(text: str | None) -> int | None:
+    """
+    64-bit SimHash των word 3-shingles του κανονικοποιημένου κειμένου.
+    None αν το κείμενο είναι πολύ μικρό.
+    """
+    tokens = _TOKEN.findall(normalize(text))
+    if len(tokens) < MIN_TOKENS:
+        return None
+    shingles = {" ".join(tokens[i:i + SHINGLE]) for i in range(len(tokens) - SHINGLE + 1)}
+    # bit strings και μέτρημα ανά στήλη (zip/count σε C αντί για loop 64 bits ανά shingle)
+    rows = [format(_hash64(s), "064b") for s in shingles]
+    half = len(rows) / 2
+    bits = "".join("1" if col.count("1") > half else "0" for col in zip(*rows))
+    return int(bits, 2)
+
+
+def to_hex(h: int) -> str:
+    return f"{h:016x}"
+
+
+def from_hex(s: str) -> int:
+    return int(s, 16)
+
+
+def bands(h: int) -> list[str]:
+    """
+    LSH keys: ένα ανά band ("i:xxxx"). Δύο fingerprints σε απόσταση <= MAX_DISTANCE
+    έχουν τουλάχιστον ένα κοινό key, οπότε το lookup είναι ένα indexed $in.
+    """
+    return [f"{i}:{(h >> (i * _BAND_BITS)) & _BAND_MASK:04x}" for i in range(BANDS)]
+
+
+def distance(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
@@ -0,0 +1,22 @@
+import pytest
+
+
+@pytest.fixture
+def db(monkeypatch):
+    """
+    MongoDB πάνω σε mongomock (in-memory), ένα καθαρό instance ανά test.
+    """
+    mongomock = pytest.importorskip("mongomock")
+    import mongo
+
+    import mongomock.collection
+
+    # το pymongo >= 4.9 περνά sort= στα UpdateOne/ReplaceOne του bulk_write, το mongomock όχι ακόμη
+    for name in ("add_update", "add_replace"):
+        original = getattr(mongomock.collection.BulkOperationBuilder, name)
+        monkeypatch.setattr(mongomock.collection.BulkOperationBuilder, name,
+                            lambda self, *args, _original=original, sort=None, **kwargs: _original(self, *args, **kwargs))
+
+    client = mongomock.MongoClient()
+    monkeypatch.setattr(mongo, "MongoClient", lambda *args, **kwargs: client)
+    return mongo.MongoDB(wait=False)
@@ -0,0 +1,44 @@
+from mongo import ARCHIVE_DROP_FIELDS, archive_doc, restore_archived, searches_archive
+from textnorm import normalize
+
+RANGE = {"published_at": {"$gte": "2024-01-01", "$lt": "2024-02-01"}}
+
+
+def test_archive_only_with_date_range():
+    assert searches_archive(RANGE)
+    assert not searches_archive({})
+    assert not searches_archive(None)
+    assert not searches_archive({"published_at": "2024-01-01"})
+
+
+def test_archive_doc_roundtrip():
+    doc = {"_id": 1, "url": "u", "title": "Εκλογές", "summary": "Περίληψη", "html_content": "<p>άρθρο</p>",
+           "body_text": "άρθρο", "search": {"title": "εκλογες", "summary": "περιληψη", "body": "αρθρο"},
+           "simhash_bands": ["a"], "rendered_html": "<p>άρθρο</p>", "render_version": 2}
+    stored = archive_doc(doc)
+    assert not set(ARCHIVE_DROP_FIELDS) & stored.keys()
+    assert stored["search"] == {"title": normalize("Εκλογές"), "summary": normalize("Περίληψη")}  # χωρίς body
+    assert isinstance(stored["html_content"], bytes)
+    restored = restore_archived(stored)
+    assert restored["html_content"] == "<p>άρθρο</p>" and restored["body_text"] == "άρθρο"
+    assert restored["archived"] is True
+
+
+def test_text_search_with_date_range_finds_archived(db):
+    db.archive.insert_many([
+        archive_doc({"_id": 1, "url": "a", "title": "Οι εκλογές του Ιανουαρίου", "published_at": "2024-01-10"}),
+        archive_doc({"_id": 2, "url": "b", "title": "Άλλο θέμα", "summary": "Εκλογές", "published_at": "2024-01-20"}),
+        archive_doc({"_id": 3, "url": "c", "title": "Εκλογές", "published_at": "2023-06-01"}),  # εκτός εύρους
+        archive_doc({"_id": 4, "url": "d", "title": "Καιρός", "published_at": "2024-01-15"}),
+    ])
+    found = db.search_archive(RANGE, "ΕΚΛΟΓΕΣ", ("title", "url"))
+    assert [d["url"] for d in found] == ["b", "a"]
+    assert all(d["archived"] for d in found)
+    assert db.search_archive(RANGE, "  ") == []
+
+
+def test_backfill_archive_search(db):
+    db.archive.insert_one({"_id": 1, "url": "a", "title": "Εκλογές", "published_at": "2024-01-10"})
+    assert db.backfill_archive_search() == 1
+    assert [d["url"] for d in db.search_archive(RANGE, "εκλογες")] == ["a"]
+    assert db.backfill_archive_search() == 0
@@ -0,0 +1,11 @@
+def test_backfill_derived_bumps_content_version(db):
+    db.articles.insert_one({"title": "t", "url": "u", "source": "kathimerini", "html_content": "<p>κείμενο</p>"})
+    before = db.content_version(max_age=0)
+    assert db.backfill_derived() == 1
+    assert db.content_version(max_age=0) > before
+
+
+def test_backfill_derived_without_changes_keeps_content_version(db):
+    before = db.content_version(max_age=0)
+    assert db.backfill_derived(missing_only=True) == 0
+    assert db.content_version(max_age=0) == before
@@ -0,0 +1,34 @@
+import base64
+import json
+
+from bson.objectid import ObjectId
+
+from mongo import decode_cursor, encode_cursor
+
+OID = ObjectId()
+
+
+def raw_cursor(*values) -> str:
+    return base64.urlsafe_b64encode(json.dumps(list(values)).encode()).decode().rstrip("=")
+
+
+def test_roundtrip():
+    for published_at in ("2026-01-05T10:00:00+02:00", "2026-01-05", None):
+        assert decode_cursor(encode_cursor({"published_at": published_at, "_id": OID})) == (published_at, OID)
+
+
+def test_rejects_non_string_published_at():
+    for published_at in (1, 1.5, True, {"$gt": ""}, ["2026-01-05"]):
+        assert decode_cursor(raw_cursor(published_at, str(OID))) is None
+
+
+def test_accepts_non_iso_published_at():
+    # παλιά άρθρα με ελεύθερο κείμενο: το "Παλαιότερα" δεν πρέπει να γυρνά στη σελίδα 1
+    for published_at in ("12/03/2024", "χθες"):
+        assert decode_cursor(encode_cursor({"published_at": published_at, "_id": OID})) == (published_at, OID)
+
+
+def test_rejects_invalid_ids():
+    assert decode_cursor(raw_cursor("2026-01-05", "nope")) is None
+    assert decode_cursor("!!!") is None
+    assert decode_cursor(None) is None
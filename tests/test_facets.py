@@ -0,0 +1,15 @@
+def test_facets_without_values_do_not_rebuild_forever(db):
+    # π.χ. άρθρο από το /create με κενά source/category: το rebuild δεν γράφει facet rows
+    db.articles.insert_one({"title": "t", "url": "u", "source": "", "category": None})
+    assert db.facet_counts("source") == []
+    assert db.facet_counts("category") == []
+
+
+def test_facets_built_once_for_existing_articles(db):
+    db.articles.insert_many([
+        {"title": "a", "url": "a", "source": "naftemporiki", "category": "Πολιτική"},
+        {"title": "b", "url": "b", "source": "naftemporiki"},
+        {"title": "c", "url": "c", "source": "kathimerini"},
+    ])
+    assert db.facet_counts("source") == [("kathimerini", 1), ("naftemporiki", 2)]
+    assert db.facet_counts("category") == [("Πολιτική", 1)]
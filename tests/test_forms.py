@@ -0,0 +1,15 @@
+import pytest
+
+from app import published_at_arg
+
+
+def test_published_at_normalized_to_iso():
+    assert published_at_arg("2025-01-01T12:00") == "2025-01-01T12:00:00"
+    assert published_at_arg("12/03/2024") == "2024-03-12T00:00:00"
+    assert published_at_arg("2025-01-01T12:00:00+02:00") == "2025-01-01T12:00:00+02:00"
+    assert published_at_arg("  ") is None
+
+
+def test_published_at_rejects_free_text():
+    with pytest.raises(ValueError):
+        published_at_arg("χθες")
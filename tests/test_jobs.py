@@ -0,0 +1,35 @@
+import pytest
+from pymongo.errors import DuplicateKeyError
+
+import jobs
+
+
+@pytest.fixture
+def queue(db):
+    return jobs.JobQueue(db)
+
+
+def test_enqueue_returns_existing_job(queue):
+    first, created = queue.enqueue(["kathimerini"], 1, 1.0)
+    assert created
+    assert queue.enqueue(["kathimerini"], 1, 1.0) == (first, False)
+
+
+def test_enqueue_race_returns_job_of_other_request(queue, monkeypatch):
+    # το ίδιο job τελειώνει ανάμεσα στο insert και στο find, και ένα άλλο request το ξαναβάζει
+    other, _ = queue.enqueue(["kathimerini"], 1, 1.0)
+    find_one, calls = queue.jobs.find_one, []
+
+    def racy_find_one(*args, **kwargs):
+        calls.append(args)
+        return None if len(calls) == 1 else find_one(*args, **kwargs)
+
+    monkeypatch.setattr(queue.jobs, "find_one", racy_find_one)
+    assert queue.enqueue(["kathimerini"], 1, 1.0) == (other, False)
+
+
+def test_enqueue_gives_up_after_bounded_attempts(queue, monkeypatch):
+    queue.enqueue(["kathimerini"], 1, 1.0)
+    monkeypatch.setattr(queue.jobs, "find_one", lambda *a, **k: None)
+    with pytest.raises(DuplicateKeyError):
+        queue.enqueue(["kathimerini"], 1, 1.0)
@@ -0,0 +1,54 @@
+import random
+
+import pytest
+from bson.objectid import ObjectId
+
+
+def seed_stories(db, n: int = 135, seed: int = 0):
+    # near-duplicates δημοσιεύονται μαζί: τα άρθρα ενός story είναι διαδοχικά
+    rnd, docs, story = random.Random(seed), [], None
+    for i in range(n):
+        if story is None or rnd.random() < 0.6:
+            story = f"s{i}"
+        docs.append({"_id": ObjectId(), "title": str(i), "url": f"u{i}", "story_id": story,
+                     "published_at": f"2026-01-01T{i // 60:02d}:{i % 60:02d}:00"})
+    db.articles.insert_many(docs)
+
+
+def walk(db, limit: int, collapse: bool):
+    pages, cursor = [], None
+    while True:
+        items, next_cursor, prev_cursor = db.page_articles(limit=limit, before=cursor, collapse=collapse,
+                                                           fields=("title", "story_id"))
+        pages.append(([a["title"] for a in items], prev_cursor))
+        if not next_cursor:
+            return pages
+        cursor = next_cursor
+
+
+@pytest.mark.parametrize("seed", range(4))
+@pytest.mark.parametrize("collapse", [True, False])
+def test_newer_pages_match_older_pages(db, seed, collapse):
+    seed_stories(db, seed=seed)
+    pages = walk(db, limit=10, collapse=collapse)
+    assert len(pages) > 3
+
+    cursor = pages[-1][1]
+    for expected, _ in reversed(pages[:-1]):
+        items, _, cursor = db.page_articles(limit=10, after=cursor, collapse=collapse, fields=("title", "story_id"))
+        assert [a["title"] for a in items] == expected
+    assert cursor is None  # πίσω στην πρώτη σελίδα
+
+
+def test_collapsed_pages_show_each_story_once_newest_first(db):
+    seed_stories(db)
+    seen = []
+    for titles, _ in walk(db, limit=10, collapse=True):
+        stories = [db.articles.find_one({"title": t})["story_id"] for t in titles]
+        assert len(stories) == len(set(stories))
+        seen += titles
+    # αντιπρόσωπος κάθε story: το νεότερο άρθρο του
+    newest = {}
+    for doc in db.articles.find().sort("published_at", -1):
+        newest.setdefault(doc["story_id"], doc["title"])
+    assert sorted(seen) == sorted(newest.values())
@@ -0,0 +1,61 @@
+"""
+Regression tests του sanitizer: το rendered_html σερβίρεται με |safe, άρα ό,τι βγάζει
+το sanitize_html δεν πρέπει ποτέ να περιέχει ενεργό markup εκτός allowlist.
+"""
+import pytest
+
+import htmlparse
+from sanitize import sanitize_html
+
+
+@pytest.fixture(params=htmlparse.available_backends())
+def backend(request, monkeypatch):
+    monkeypatch.setattr(htmlparse, "DEFAULT_BACKEND", request.param)
+    return request.param
+
+
+def assert_inert(out: str):
+    lowered = out.lower()
+    assert "<script" not in lowered
+    assert "<img src=x" not in lowered
+    assert "onerror" not in lowered or "&lt;" in lowered
+
+
+def test_escaped_entities_in_unwrapped_wrapper_stay_escaped(backend):
+    out = sanitize_html('<div class="entry-content">&lt;img src=x onerror=alert(1)&gt;<p>x</p></div>')
+    assert out.startswith("&lt;img src=x onerror=alert(1)&gt;")
+    assert "<p>x</p>" in out
+    assert_inert(out)
+
+
+def test_escaped_entities_in_allowed_tags(backend):
+    assert sanitize_html("<p>a &amp; b &lt;script&gt;</p>") == "<p>a &amp; b &lt;script&gt;</p>"
+
+
+@pytest.mark.parametrize("tag", ["xmp", "title", "noembed", "noframes", "textarea", "noscript", "style"])
+def test_raw_text_elements_do_not_leak_markup(backend, tag):
+    out = sanitize_html(f"<div><{tag}><script>alert(1)</script></{tag}><p>ok</p></div>")
+    assert_inert(out)
+    assert "<p>ok</p>" in out
+
+
+@pytest.mark.parametrize("html", [
+    "<![CDATA[<script>alert(1)</script>]]><p>y</p>",
+    "<!-- <script>alert(1)</script> --><p>y</p>",
+    "<?php <script>alert(1)</script> ?><p>y</p>",
+])
+def test_special_strings_are_removed_or_escaped(backend, html):
+    out = sanitize_html(html)
+    assert_inert(out)
+    assert "<p>y</p>" in out
+
+
+def test_dangerous_attributes_and_urls(backend):
+    out = sanitize_html('<p onclick="x()">a <a href="javascript:alert(1)">l</a></p>'
+                        '<img src="https://a/b.jpg" onerror="x()">')
+    assert "onclick" not in out and "javascript:" not in out and "onerror" not in out
+    assert 'src="https://a/b.jpg"' in out
+
+
+def test_pre_keeps_whitespace(backend):
+    assert sanitize_html("<pre>a   b</pre><p>x   y</p>") == "<pre>a   b</pre><p>x y</p>"
@@ -0,0 +1,39 @@
+import re
+import unicodedata
+
+from htmlparse import make_soup
+
+_WS = re.compile(r"\s+")
+
+
+def strip_accents(s: str) -> str:
+    """
+    ά→α, ϊ→ι, ΐ→ι κτλ: NFD και πετάμε τα combining marks (τόνοι, διαλυτικά).
+    """
+    return "".join(ch for ch in unicodedata.normalize("NFD", s) if not unicodedata.combining(ch))
+
+
+def normalize(s: str | None) -> str:
+    """
+    Κανονικοποίηση για αναζήτηση/σύγκριση: χωρίς τόνους, casefold (Σ/ς→σ), ενιαία κενά.
+    """
+    if not s:
+        return ""
+    return _WS.sub(" ", strip_accents(s).casefold()).strip()
+
+
+def excerpt(text: str | None, length: int) -> str:
+    """
+    Πρώτοι ~length χαρακτήρες, κομμένοι σε όριο λέξης, με "…" αν κόπηκε.
+    """
+    text = _WS.sub(" ", text or "").strip()
+    if len(text) <= length:
+        return text
+    cut = text[:length + 1].rsplit(" ", 1)[0] or text[:length]
+    return cut.rstrip(" ,.;:·-") + "…"
+
+
+def html_to_text(html: str | None) -> str:
+    if not html:
+        return ""
+    return make_soup(html).get_text(" ", strip=True)
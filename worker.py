@@ -0,0 +1,152 @@
+import os
+import time
+import uuid
+import socket
+import argparse
+import logging
+import signal
+import threading
+
+from jobs import JobQueue, HEARTBEAT_EVERY
+from mongo import MongoDB
+from scraperall import scrape_all
+
+logger = logging.getLogger("worker")
+logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+
+STALE_CHECK_EVERY = 60  # sec: έλεγχος για running jobs νεκρών workers
+
+
+def worker_id() -> str:
+    # hostname (container) + pid + τυχαίο suffix: ένας worker που ξεκινά ξανά με ίδιο pid δεν
+    # "κληρονομεί" τα jobs της προηγούμενης εκτέλεσης
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+def _heartbeat(queue: JobQueue, job_id, wid: str, done: threading.Event):
+    while not done.wait(HEARTBEAT_EVERY):
+        try:
+            if not queue.heartbeat(job_id, wid):
+                logger.warning(f"Job {job_id} is no longer held by this worker")
+                return
+        except Exception:
+            logger.exception(f"Heartbeat for job {job_id} failed")
+
+
+def _fail_stale(queue: JobQueue) -> int:
+    try:
+        n = queue.fail_stale()
+    except Exception:
+        logger.exception("Stale job check failed")
+        return 0
+    if n:
+        logger.warning(f"Marked {n} stale running job(s) as failed")
+    return n
+
+
+def run_job(queue: JobQueue, job, wid: str | None = None, db: MongoDB | None = None):
+    params = job.get("params") or {}
+    logger.info(f"Job {job['_id']} started: {params}")
+    done = threading.Event()
+    threading.Thread(target=_heartbeat, args=(queue, job["_id"], wid, done), name="heartbeat", daemon=True).start()
+    try:
+        _run_job(queue, job, params, db)
+    finally:
+        done.set()
+
+
+def _run_job(queue: JobQueue, job, params, db):
+    try:
+        results = scrape_all(
+            pages=params.get("pages", 1),
+            delay=params.get("delay", 1.0),
+            sources=params.get("sources"),
+            progress=lambda source, stats: queue.report_progress(job["_id"], source, stats),
+            db=db,
+        )
+    except Exception as e:
+        logger.exception(f"Job {job['_id']} failed")
+        queue.finish(job["_id"], error=str(e))
+        return
+
+    errors = [f"{r['source']}: {r['error']}" for r in results if r.get("error")]
+    queue.finish(job["_id"], results=results, error="; ".join(errors) or None)
+    logger.info(f"Job {job['_id']} finished")
+
+
+RERENDER_BATCH = 200  # άρθρα ανά idle poll (rendered_html παλιάς έκδοσης)
+
+
+def _rerender_batch(db: MongoDB) -> int:
+    try:
+        n = db.rerender_articles(limit=RERENDER_BATCH)
+    except Exception:
+        logger.exception("Background re-render failed")
+        return 0
+    if n:
+        logger.info(f"Re-rendered {n} article(s)")
+    return n
+
+
+ARCHIVE_BATCH = 500       # άρθρα ανά idle poll
+ARCHIVE_CHECK_EVERY = 3600  # sec: έλεγχος για άρθρα προς archive όταν δεν βρέθηκε κανένα
+
+
+def _archive_batch(db: MongoDB, days: int) -> int:
+    try:
+        n = db.archive_articles(days=days, batch_size=ARCHIVE_BATCH, limit=ARCHIVE_BATCH)
+    except Exception:
+        logger.exception("Background archiving failed")
+        return 0
+    if n:
+        logger.info(f"Archived {n} article(s) older than {days} days")
+    return n
+
+
+def main(poll: float = 2.0, once: bool = False, rerender: bool = True, archive_days: int = 0):
+    """
+    Τρέχει τα scraping jobs εκτός web process. SIGTERM/SIGINT: τελειώνει το τρέχον job και σταματά.
+    Όταν η ουρά είναι άδεια, ξανακάνει render (λίγα-λίγα) τα άρθρα με παλιό render_version
+    και, αν archive_days > 0, μετακινεί στο archive όσα είναι παλαιότερα (ARCHIVE_BATCH τη φορά).
+    Κατά το job στέλνει heartbeat. Στην εκκίνηση και ανά STALE_CHECK_EVERY, τα running jobs
+    νεκρών workers (χωρίς heartbeat) γίνονται failed.
+    """
+    db = MongoDB()
+    queue = JobQueue(db)
+    wid = worker_id()
+    stop = threading.Event()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(sig, lambda *_: stop.set())
+
+    logger.info(f"Worker {wid} ready, waiting for jobs...")
+    next_archive = next_stale_check = 0.0
+    while not stop.is_set():
+        if time.monotonic() >= next_stale_check:
+            _fail_stale(queue)
+            next_stale_check = time.monotonic() + STALE_CHECK_EVERY
+        job = queue.claim(wid)
+        if job:
+            run_job(queue, job, wid, db)
+        elif rerender and _rerender_batch(db):
+            continue
+        elif archive_days and time.monotonic() >= next_archive:
+            if not _archive_batch(db, archive_days):
+                next_archive = time.monotonic() + ARCHIVE_CHECK_EVERY
+            continue
+        elif once:
+            break
+        else:
+            stop.wait(poll)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--poll", type=float, default=2.0, help="Διάστημα ελέγχου ουράς (sec)")
+    parser.add_argument("--once", action="store_true", help="Τρέχει ό,τι υπάρχει στην ουρά και τερματίζει")
+    parser.add_argument("--no-rerender", action="store_true", help="Χωρίς background re-render άρθρων")
+    parser.add_argument("--archive-days", type=int, default=int(os.getenv("ARCHIVE_DAYS", 0)),
+                        help="Background archiving άρθρων παλαιότερων από τόσες μέρες (0 = off, env ARCHIVE_DAYS)")
+    args = parser.parse_args()
+
+    main(poll=args.poll, once=args.once, rerender=not args.no_rerender, archive_days=args.archive_days)
@@ -0,0 +1,7 @@
+"""
+WSGI entry point: gunicorn -c gunicorn.conf.py (ή οποιοσδήποτε WSGI server με wsgi:app).
+Το import δεν συνδέεται στη Mongo: ο client φτιάχνεται στο πρώτο request κάθε worker (app.get_db).
+"""
+from app import app
+
+application = app